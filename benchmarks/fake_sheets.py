@@ -0,0 +1,128 @@
+# --- FAUX CLIENT GSPREAD ---
+# Remplace gspread.authorize(...) en mémoire : même interface que ce qu'utilise storage.SheetsBackend,
+# avec une latence réglable par appel et des erreurs de quota (HTTP 429) injectées au hasard.
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+import requests
+from gspread.exceptions import APIError
+from gspread.utils import a1_to_rowcol
+
+
+def erreur_quota():
+    r = requests.Response()
+    r.status_code = 429
+    r._content = json.dumps({"error": {"code": 429, "message": "Quota exceeded (simulé)", "status": "RESOURCE_EXHAUSTED"}}).encode()
+    return APIError(r)
+
+
+class FakeWorksheet:
+    def __init__(self, client, title, grid):
+        self.client, self.title = client, title
+        self.grid = [[str(v) for v in r] for r in grid]
+
+    def _set(self, r, c, v):
+        while len(self.grid) < r: self.grid.append([])
+        row = self.grid[r - 1]
+        while len(row) < c: row.append("")
+        row[c - 1] = "" if v is None else str(v)
+
+    def get_all_values(self):
+        self.client.appel(self.title, "read")
+        return [list(r) for r in self.grid]
+
+    def update(self, values, range_name="A1"):
+        self.client.appel(self.title, "write")
+        r0, c0 = a1_to_rowcol(range_name.split(":")[0])
+        for i, row in enumerate(values):
+            for j, v in enumerate(row): self._set(r0 + i, c0 + j, v)
+
+    def batch_update(self, data):
+        self.client.appel(self.title, "write")
+        for d in data:
+            r0, c0 = a1_to_rowcol(d["range"].split(":")[0])
+            for i, row in enumerate(d["values"]):
+                for j, v in enumerate(row): self._set(r0 + i, c0 + j, v)
+
+    def append_rows(self, rows):
+        self.client.appel(self.title, "write")
+        self.grid += [[str(v) for v in r] for r in rows]
+
+    def append_row(self, row): self.append_rows([row])
+
+    def batch_clear(self, ranges):
+        self.client.appel(self.title, "write")
+        for rg in ranges:
+            a, b = rg.split(":")
+            (r0, c0), (r1, c1) = a1_to_rowcol(a), a1_to_rowcol(b)
+            for r in range(r0, min(r1, len(self.grid)) + 1):
+                for c in range(c0, min(c1, len(self.grid[r - 1])) + 1): self.grid[r - 1][c - 1] = ""
+        while self.grid and not any(self.grid[-1]): self.grid.pop()
+
+
+class FakeSpreadsheet:
+    def __init__(self, client): self.client, self.ws = client, {}
+
+    def worksheets(self):
+        self.client.appel(None, "meta")
+        return list(self.ws.values())
+
+    def worksheet(self, name):
+        self.client.appel(name, "meta")
+        return self.ws[name]
+
+    def add_worksheet(self, name, rows, cols):
+        self.client.appel(name, "meta")
+        self.ws[name] = FakeWorksheet(self.client, name, [])
+        return self.ws[name]
+
+    def values_batch_get(self, ranges):
+        names = [r.strip("'").replace("''", "'") for r in ranges]
+        for n in names: self.client.appel(n, "read", latence=False)
+        self.client.appel(None, "batch_read")
+        return {"valueRanges": [{"values": [list(r) for r in self.ws[n].grid]} for n in names]}
+
+    def get_lastUpdateTime(self):
+        self.client.appel(None, "meta")
+        return str(self.client.version)
+
+
+class FakeClient:
+    """latence : secondes par appel (+/- jitter) ; quota : probabilité qu'un appel échoue en 429"""
+    def __init__(self, sheets=None, latence=0.0, jitter=0.0, quota=0.0, seed=0):
+        self.latence, self.jitter, self.quota = latence, jitter, quota
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sh = FakeSpreadsheet(self)
+        self.version = 0
+        self.calls = Counter()     # (feuille, type) -> nombre d'appels
+        self.quota_errors = 0
+        self.charger(sheets or {})
+
+    def open(self, name): return self.sh
+
+    def charger(self, sheets):
+        """Remplace tout le contenu du classeur et remet les compteurs à zéro"""
+        with self.lock:
+            self.sh.ws = {n: FakeWorksheet(self, n, g) for n, g in sheets.items()}
+            self.calls.clear(); self.quota_errors = 0; self.version += 1
+
+    def appel(self, feuille, type_, latence=True):
+        with self.lock:
+            self.calls[(feuille, type_)] += 1
+            if type_ == "write": self.version += 1
+            echec = self.quota > 0 and self.rng.random() < self.quota
+            if echec: self.quota_errors += 1
+            pause = max(0.0, self.latence + self.rng.uniform(-self.jitter, self.jitter)) if latence else 0.0
+        if pause: time.sleep(pause)
+        if echec: raise erreur_quota()
+
+    def compteurs(self):
+        """{'read': n, 'write': n, ...} depuis le dernier chargement"""
+        tot = Counter()
+        with self.lock:
+            for (_, t), n in self.calls.items(): tot[t] += n
+        return dict(tot)
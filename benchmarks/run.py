@@ -0,0 +1,235 @@
+# --- BANC D'ESSAI ---
+# Mesure les chemins chauds de l'appli sur des données synthétiques, contre un faux Google Sheets
+# avec latence et erreurs de quota réglables. Rapport JSON comparable d'une version à l'autre.
+#
+#   python -m benchmarks.run --tailles 100,1000,5000 --latence 0.08 --sortie bench_report.json
+#   python -m benchmarks.run --rapide --compare bench_report.json
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+import categories
+import scraper
+from benchmarks import synthetic
+from benchmarks.fake_sheets import FakeClient
+
+APP_PATH = os.path.join(ROOT, "App.py")
+
+
+# --- MESURE ---
+def resume(durees):
+    d = sorted(durees)
+    return {"runs": len(d), "median_s": d[len(d) // 2], "p95_s": d[min(len(d) - 1, int(len(d) * 0.95))],
+            "min_s": d[0], "max_s": d[-1]}
+
+def mesurer(fn, repetitions, echauffement=1):
+    for _ in range(echauffement): fn()
+    durees = []
+    for _ in range(repetitions):
+        t = time.perf_counter(); fn(); durees.append(time.perf_counter() - t)
+    return resume(durees)
+
+def appels_par_op(fake, avant, n):
+    apres = fake.compteurs()
+    return {k: round((apres.get(k, 0) - avant.get(k, 0)) / max(1, n), 2) for k in set(apres) | set(avant)}
+
+
+# --- APPLI EN MODE « NU » ---
+def charger_app(fake):
+    """Exécute App.py hors `streamlit run` (mode nu) avec gspread branché sur le faux client.
+    Les fonctions de l'appli (fetch_data, save_data, process_end_match...) sont ensuite appelables directement."""
+    import gspread
+    import streamlit as st
+    import streamlit.logger
+    from oauth2client.service_account import ServiceAccountCredentials
+    from streamlit.runtime.secrets import Secrets
+    # La config se charge à la première lecture et réimpose son niveau de log : on la lit d'abord.
+    # Sans ça, « missing ScriptRunContext » s'affiche à chaque appel st.* en mode nu.
+    st.config.get_option("logger.level"); streamlit.logger.set_log_level(logging.ERROR)
+    gspread.authorize = lambda creds: fake
+    ServiceAccountCredentials.from_json_keyfile_dict = staticmethod(lambda d, scope: None)
+    # Même substitution que streamlit.testing.AppTest quand on lui passe des secrets
+    secrets = Secrets(); secrets._secrets = {"gcp_service_account": {"type": "service_account"}}
+    st.secrets = secrets
+    spec = importlib.util.spec_from_file_location("App", APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+def reinitialiser(app):
+    """Nouveaux backend / poller / file d'écriture : la taille suivante repart d'un cache vide"""
+    import streamlit as st
+    st.cache_resource.clear()
+    app.get_poller()
+
+def drainer(app, timeout=300):
+    q = app.get_write_queue()
+    fin = time.time() + timeout
+    while q.status()["pending"]:
+        if time.time() > fin: raise TimeoutError("écritures toujours en attente")
+        time.sleep(0.002)
+    return len(q.status()["failed"])
+
+
+# --- SCÉNARIOS ---
+def bench_parse(taille, rep):
+    club = synthetic.athletes(max(50, taille // 5))
+    page = synthetic.entry_list_html(taille, max(2, taille // 20), club)
+    ath = pd.DataFrame(club[1:], columns=club[0])
+    stats = {}
+    r = mesurer(lambda: scraper.parse_html_content(page, ath, stats), rep)
+    return {**r, "html_ko": round(len(page) / 1024, 1), "athletes": len(ath),
+            "extraction_s": stats.get("extraction_s"), "matching_s": stats.get("matching_s")}
+
+def bench_categorie_unitaire(app, taille, rep):
+    club = synthetic.athletes(min(taille, 2000))[1:]
+    r = mesurer(lambda: [app.calculer_categorie(a[2], a[3], a[4], synthetic.DATE_COMPET) for a in club], rep)
+    return {**r, "lignes": len(club), "par_ligne_us": round(r["median_s"] / len(club) * 1e6, 2)}
+
+def bench_categorie_vectorise(taille, rep):
+    club = synthetic.athletes(taille)
+    df = pd.DataFrame(club[1:], columns=club[0])
+    r = mesurer(lambda: categories.categorize(df, synthetic.DATE_COMPET), rep)
+    return {**r, "lignes": len(df), "par_ligne_us": round(r["median_s"] / len(df) * 1e6, 2)}
+
+def bench_lecture_froide(app, fake, taille, rep):
+    backend = app.get_backend()
+    avant = fake.compteurs()
+    r = mesurer(lambda: backend.read("Feuille 1", synthetic.LIVE_COLS), rep)
+    return {**r, "appels": appels_par_op(fake, avant, rep + 1)}
+
+def bench_aller_retour(app, fake, taille, rep, quota):
+    """fetch_data -> une cellule modifiée -> save_data -> attente de l'écriture effective dans Sheets"""
+    clic, total, echecs = [], [], 0
+    avant = fake.compteurs(); fake.quota = quota
+    try:
+        for i in range(rep):
+            t0 = time.perf_counter()
+            df = app.fetch_data("Feuille 1", app.LIVE_COLS)
+            row = i % len(df)
+            df.at[row, "Casque"] = "Bleu" if df.at[row, "Casque"] == "Rouge" else "Rouge"
+            app.save_data(df, "Feuille 1", [], label="bench")
+            clic.append(time.perf_counter() - t0)
+            echecs += drainer(app)
+            total.append(time.perf_counter() - t0)
+    finally: fake.quota = 0.0
+    return {**resume(total), "clic": resume(clic), "appels": appels_par_op(fake, avant, rep),
+            "erreurs_quota": fake.quota_errors, "ecritures_abandonnees": echecs}
+
+def bench_fin_de_combat(app, fake, taille, rep, quota):
+    """process_end_match sur des combats en cours : Feuille 1 + Historique (+ PreInscriptions si qualifié)"""
+    live = app.get_live_data()
+    candidats = [i for i in live.index if live.at[i, "Statut"] != "Terminé"][:rep]
+    clic, total, echecs = [], [], 0
+    avant = fake.compteurs(); fake.quota = quota
+    try:
+        for n, idx in enumerate(candidats):
+            t0 = time.perf_counter()
+            df = app.get_live_data()
+            app.process_end_match(df, idx, synthetic.MEDAILLES[n % 3], "Open Bench", "2026-03-14", "Open Test")
+            clic.append(time.perf_counter() - t0)
+            echecs += drainer(app)
+            total.append(time.perf_counter() - t0)
+    finally: fake.quota = 0.0
+    if not total: return None
+    return {**resume(total), "clic": resume(clic), "appels": appels_par_op(fake, avant, len(total)),
+            "erreurs_quota": fake.quota_errors, "ecritures_abandonnees": echecs}
+
+def bench_live(app, taille, rep):
+    """Rendu HTML complet du tableau LIVE, sans le cache par instantané"""
+    df, idx = app.get_live_data(), app.get_athlete_index()
+    r = mesurer(lambda: app.live_cards_html(app.live_view(df), idx), rep)
+    res = {**r, "cartes": len(app.live_view(df))}
+    res["memo"] = mesurer(app.get_live_board, rep)
+    return res
+
+def bench_page(taille, rep):
+    """Exécution complète du script (onglet LIVE affiché), comme un spectateur qui recharge la page"""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=300)
+    at.secrets["gcp_service_account"] = {"type": "service_account"}
+    return mesurer(lambda: at.run(), rep)
+
+
+# --- RAPPORT ---
+def version_git():
+    try: return subprocess.run(["git", "-C", ROOT, "describe", "--always", "--dirty"], capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception: return ""
+
+def comparer(actuel, reference, seuil):
+    """Lignes (bench, taille, avant, après, ratio) ; ratio > 1 + seuil = régression"""
+    ref = {(r["bench"], r["taille"]): r["median_s"] for r in reference["resultats"]}
+    out = []
+    for r in actuel["resultats"]:
+        avant = ref.get((r["bench"], r["taille"]))
+        if avant: out.append((r["bench"], r["taille"], avant, r["median_s"], r["median_s"] / avant))
+    return out, [l for l in out if l[4] > 1 + seuil]
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Banc d'essai Fight Tracker (données synthétiques, faux Google Sheets)")
+    p.add_argument("--tailles", default="100,1000,5000", help="nombres de combats / concurrents, séparés par des virgules")
+    p.add_argument("--repetitions", type=int, default=5)
+    p.add_argument("--latence", type=float, default=0.05, help="secondes par appel au faux Sheets")
+    p.add_argument("--jitter", type=float, default=0.01)
+    p.add_argument("--quota", type=float, default=0.0, help="probabilité d'erreur 429 par appel pendant les écritures")
+    p.add_argument("--sans-page", action="store_true", help="ne pas mesurer l'exécution complète du script (AppTest)")
+    p.add_argument("--rapide", action="store_true", help="tailles 100,500, 3 répétitions")
+    p.add_argument("--sortie", default="bench_report.json")
+    p.add_argument("--compare", help="rapport de référence : signale les scénarios plus lents")
+    p.add_argument("--seuil", type=float, default=0.2, help="ralentissement toléré avant de signaler une régression (0.2 = +20 %%)")
+    a = p.parse_args(argv)
+    if a.rapide: a.tailles, a.repetitions = "100,500", 3
+    tailles = [int(t) for t in a.tailles.split(",") if t.strip()]
+
+    # Pas de rafraîchissement en tâche de fond ni de délai de regroupement : on mesure les appels eux-mêmes
+    os.environ.update(STORAGE_BACKEND="sheets", POLL_INTERVAL="3600", WRITE_DELAY="0", LIVE_REFRESH="3600")
+
+    fake = FakeClient(synthetic.classeur(tailles[0]), latence=a.latence, jitter=a.jitter)
+    app = charger_app(fake)
+    resultats = []
+    def note(bench, taille, r):
+        if r is None: return
+        resultats.append({"bench": bench, "taille": taille, **r})
+        print(f"{bench:<24} {taille:>6}  médiane {r['median_s']*1000:9.2f} ms   p95 {r['p95_s']*1000:9.2f} ms", flush=True)
+
+    for taille in tailles:
+        fake.charger(synthetic.classeur(taille)); reinitialiser(app)
+        note("parse_html_content", taille, bench_parse(taille, a.repetitions))
+        note("calculer_categorie", taille, bench_categorie_unitaire(app, taille, a.repetitions))
+        note("categorize_vectorise", taille, bench_categorie_vectorise(taille, a.repetitions))
+        note("lecture_froide", taille, bench_lecture_froide(app, fake, taille, a.repetitions))
+        note("fetch_save_aller_retour", taille, bench_aller_retour(app, fake, taille, a.repetitions, a.quota))
+        note("process_end_match", taille, bench_fin_de_combat(app, fake, taille, a.repetitions, a.quota))
+        note("rendu_live", taille, bench_live(app, taille, a.repetitions))
+        if not a.sans_page: note("page_complete", taille, bench_page(taille, a.repetitions))
+
+    rapport = {"version": version_git(), "date": datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(), "machine": platform.machine(),
+               "parametres": {"tailles": tailles, "repetitions": a.repetitions, "latence_s": a.latence, "jitter_s": a.jitter, "quota": a.quota},
+               "resultats": resultats}
+    with open(a.sortie, "w", encoding="utf-8") as f: json.dump(rapport, f, ensure_ascii=False, indent=1)
+    print(f"Rapport : {a.sortie}")
+
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as f: reference = json.load(f)
+        lignes, regressions = comparer(rapport, reference, a.seuil)
+        for bench, taille, avant, apres, ratio in lignes:
+            print(f"{'⚠️ ' if ratio > 1 + a.seuil else '   '}{bench:<24} {taille:>6}  {avant*1000:9.2f} -> {apres*1000:9.2f} ms  (x{ratio:.2f})")
+        if regressions: return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
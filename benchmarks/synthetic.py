@@ -0,0 +1,94 @@
+# --- DONNÉES SYNTHÉTIQUES ---
+# Jeux de données déterministes (graine fixe) au format des feuilles et des pages fédérales :
+# mêmes colonnes que l'appli, valeurs en texte comme les renvoie Google Sheets.
+import html
+import random
+
+SYLLABES = ["MA", "RO", "LI", "DU", "BER", "NARD", "PE", "TIT", "LE", "FEB", "VRE", "GAR", "NIER", "CHE", "VAL",
+            "MO", "REAU", "BO", "NET", "FOU", "QUET", "GI", "RARD", "LAM", "BERT", "DE", "LA", "COUR", "SI", "MON"]
+PRENOMS = ["Jean", "Léa", "Lucas", "Emma", "Hugo", "Chloé", "Louis", "Inès", "Nathan", "Jade", "Enzo", "Manon",
+           "Noah", "Camille", "Adam", "Sarah", "Théo", "Lina", "Tom", "Zoé"]
+CLUBS = ["AS Boxe", "Ring Olympique", "Team Savate", "Boxing Club", "US Combat", "Fight Academy"]
+AGES = ["Poussin", "Benjamin", "Minime", "Cadet", "Junior", "Senior", "Vétéran"]
+POIDS = [-32, -37, -42, -47, -52, -57, -63, -69, -74, 74]
+MEDAILLES = ["🥇 Or", "🥈 Argent", "🥉 Bronze"]
+DETAILS = ["Finale Directe", "Poule (1 ou 2 combats)", "Demi + Finale", "Quart -> Finale", "8ème -> Finale"]
+
+DATE_COMPET = "14/03/2026"  # format de la colonne Date_Prevue du Calendrier
+
+LIVE_COLS = ["Combattant", "Aire", "Numero", "Casque", "Statut", "Palmares", "Details_Tour", "Medaille_Actuelle"]
+ATHLETES_COLS = ["Nom", "Prenom", "Annee_Naissance", "Poids", "Sexe", "Titre_Honorifique"]
+HISTORIQUE_COLS = ["Competition", "Date", "Combattant", "Medaille"]
+
+
+def _nom(rng):
+    return "".join(rng.choice(SYLLABES) for _ in range(rng.randint(2, 3)))
+
+def categories(m, rng=None):
+    """m libellés de catégories distincts : 'Minime M -42kg', 'Senior F +74kg'..."""
+    rng = rng or random.Random(0)
+    toutes = [f"{a} {s} {'+' if p > 0 else '-'}{abs(p)}kg" for a in AGES for s in "MF" for p in POIDS]
+    if m <= len(toutes): return rng.sample(toutes, m)
+    return toutes + [f"Open {i} -{60 + i}kg" for i in range(m - len(toutes))]
+
+def athletes(n, seed=1):
+    """Grille Athletes : en-tête + n athlètes du club (quelques titres honorifiques)"""
+    rng = random.Random(seed)
+    rows, vus = [], set()
+    while len(rows) < n:
+        nom, prenom = _nom(rng), rng.choice(PRENOMS)
+        if (nom, prenom) in vus: continue
+        vus.add((nom, prenom))
+        titre = rng.choice(["Champion régional", "Vice-champion de France"]) if rng.random() < 0.1 else ""
+        rows.append([nom, prenom, str(rng.randint(1975, 2017)), f"{rng.uniform(25, 95):.1f}", rng.choice("MF"), titre])
+    return [ATHLETES_COLS] + rows
+
+def entry_list_html(n, m, club=None, seed=2):
+    """Page d'inscrits : un tableau de mise en page (leurre) puis n concurrents répartis sur m catégories.
+    Les athlètes de `club` (grille Athletes) sont glissés dans la liste, sans accents ni casse d'origine."""
+    rng = random.Random(seed)
+    cats = categories(m, rng)
+    lignes = [(_nom(rng), rng.choice(PRENOMS), rng.choice(CLUBS), rng.choice(cats)) for _ in range(n)]
+    for i, ath in enumerate((club or [])[1:]):
+        if i >= n: break
+        lignes[rng.randrange(n)] = (ath[0].upper(), ath[1], "Notre Club", rng.choice(cats))
+    esc = html.escape
+    out = ["<html><head><title>Liste des inscrits</title></head><body>",
+           "<table class='menu'><tr><td><a href='/'>Accueil</a></td><td><a href='/compet'>Compétitions</a></td></tr></table>",
+           "<table class='inscrits'><thead><tr><th>Nom</th><th>Prénom</th><th>Club</th><th>Catégorie</th></tr></thead><tbody>"]
+    out += [f"<tr><td>{esc(a)}</td><td>{esc(b)}</td><td>{esc(c)}</td><td>{esc(d)}</td></tr>" for a, b, c, d in lignes]
+    out.append("</tbody></table></body></html>")
+    return "".join(out)
+
+def live_sheet(n, club, nb_aires=6, seed=3):
+    """Grille Feuille 1 : n combats, un quart terminés, les autres programmés ou à programmer"""
+    rng = random.Random(seed)
+    noms = [f"{r[0]} {r[1]}" for r in club[1:]] or ["X Y"]
+    rows, num = [], {a: 0 for a in range(1, nb_aires + 1)}
+    for i in range(n):
+        aire = rng.randint(1, nb_aires)
+        r = rng.random()
+        if r < 0.25: statut, medaille = "Terminé", rng.choice(MEDAILLES + ["Défaite"])
+        elif r < 0.85: statut, medaille = "A venir", ""
+        else: statut, medaille, aire = "A venir", "", 0
+        if aire: num[aire] += 1
+        cat = categories(1, rng)[0]
+        rows.append([rng.choice(noms), str(aire), str(num[aire] if aire else 0), rng.choice(["Rouge", "Bleu"]), statut,
+                     medaille if statut == "Terminé" else "", f"{cat} ({rng.choice(DETAILS)})", medaille if statut == "Terminé" else ""])
+    return [LIVE_COLS] + rows
+
+def historique(n, club, seed=4):
+    """Grille Historique : n résultats sur plusieurs saisons, dans l'ordre d'ajout (dates croissantes)"""
+    rng = random.Random(seed)
+    noms = [f"{r[0]} {r[1]}" for r in club[1:]] or ["X Y"]
+    dates = sorted(f"{rng.randint(2015, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(n))
+    return [HISTORIQUE_COLS] + [[f"Open {d[:4]} #{rng.randint(1, 8)}", d, rng.choice(noms), rng.choice(MEDAILLES)] for d in dates]
+
+def classeur(taille, seed=0):
+    """Toutes les feuilles de l'appli pour une taille d'événement donnée (taille = nombre de combats LIVE)"""
+    club = athletes(max(50, taille // 5), seed=seed + 1)
+    return {"Feuille 1": live_sheet(taille, club, seed=seed + 3),
+            "Athletes": club,
+            "Historique": historique(taille * 5, club, seed=seed + 4),
+            "Calendrier": [["Nom_Competition", "Date_Prevue", "URL_Inscrits"], ["Open Test", DATE_COMPET, ""]],
+            "PreInscriptions": [["Competition_Cible", "Nom", "Prenom", "Annee", "Poids", "Sexe", "Categorie"]]}
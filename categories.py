@@ -0,0 +1,136 @@
+# --- CATÉGORIES D'ÂGE ET DE POIDS ---
+# Le barème est une donnée : pour changer une limite, on modifie les tables ci-dessous.
+# L'âge est celui de l'année de la compétition (année de la compétition - année de naissance).
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# (âge minimum, catégorie), triés par âge croissant
+AGES = [(7, "Poussin"), (10, "Benjamin"), (12, "Minime"), (14, "Cadet"), (16, "Junior"), (18, "Senior"), (41, "Vétéran")]
+
+# Limites hautes de poids (kg) par catégorie d'âge ; None = mêmes limites pour les deux sexes
+POIDS = {
+    ("Poussin", None): [23, 28, 32, 37, 42, 47],
+    ("Benjamin", None): [28, 32, 37, 42, 47, 52],
+    ("Minime", None): [32, 37, 42, 47, 52, 57, 63, 69],
+    ("Cadet", None): [32, 37, 42, 47, 52, 57, 63, 69, 74],
+}
+for _cat in ("Junior", "Senior", "Vétéran"):
+    POIDS[(_cat, "F")] = [48, 52, 56, 60, 65, 70]
+    POIDS[(_cat, "M")] = [57, 63, 69, 74, 79, 84, 89, 94]
+
+# Codes renvoyés par ligne dans la colonne "Code"
+OK = "OK"
+ANNEE_MANQUANTE = "ANNEE_MANQUANTE"
+POIDS_MANQUANT = "POIDS_MANQUANT"
+SEXE_MANQUANT = "SEXE_MANQUANT"
+ANNEE_INVALIDE = "ANNEE_INVALIDE"
+POIDS_INVALIDE = "POIDS_INVALIDE"  # illisible ou négatif
+SEXE_INVALIDE = "SEXE_INVALIDE"    # ni F ni M
+AGE_HORS_BAREME = "AGE_HORS_BAREME"
+MANQUANTS = (ANNEE_MANQUANTE, POIDS_MANQUANT, SEXE_MANQUANT)  # Categorie = ""
+INVALIDES = (ANNEE_INVALIDE, POIDS_INVALIDE, SEXE_INVALIDE)   # Categorie = "?"
+
+# Même règle que l'ancien `if not annee or not poids` : None, "", 0 et NaN comptent comme absents
+VIDES = ("", "0", "0.0", "nan", "None")
+
+
+@lru_cache(maxsize=256)
+def _annee_texte(txt):
+    # Une poignée de dates de compétition, relues à chaque ligne : to_datetime coûte cher
+    d = pd.to_datetime(txt, dayfirst=True, errors="coerce")
+    return None if pd.isna(d) else d.year
+
+def _annee_reference(date_compet):
+    if date_compet is None or date_compet == "": return datetime.now().year
+    if isinstance(date_compet, (date, datetime, pd.Timestamp)): return date_compet.year
+    annee = _annee_texte(str(date_compet))
+    return datetime.now().year if annee is None else annee
+
+def _nombres(s):
+    return pd.to_numeric(s.astype(str).str.strip().str.replace(",", ".", regex=False), errors="coerce")
+
+def _vides(s):
+    return s.isna() | s.astype(str).str.strip().isin(VIDES)
+
+def _sexes(s):
+    s = s.fillna("").astype(str).str.strip()
+    return s.where(~s.isin(["nan", "None"]), "").str.upper()
+
+def _nombre(v):
+    try: return float(str(v).strip().replace(",", "."))
+    except ValueError: return float("nan")
+
+def _vide(v):
+    return pd.isna(v) or str(v).strip() in VIDES
+
+def _sexe(v):
+    v = "" if pd.isna(v) else str(v).strip()
+    return "" if v in ("nan", "None") else v.upper()
+
+def categorize_one(annee, poids, sexe, date_compet=None):
+    """Catégorie d'un seul athlète sans passer par un DataFrame : categorize ligne à ligne,
+    mêmes règles et même priorité des codes (vérifié par tests/test_categories.py). Renvoie (Categorie, Code)."""
+    sexe = _sexe(sexe)
+    if _vide(annee): return "", ANNEE_MANQUANTE
+    if _vide(poids): return "", POIDS_MANQUANT
+    if not sexe: return "", SEXE_MANQUANT
+    a, p = _nombre(annee), _nombre(poids)
+    if np.isnan(p) or p < 0: return "?", POIDS_INVALIDE
+    if np.isnan(a): return "?", ANNEE_INVALIDE
+    if sexe not in ("F", "M"): return "?", SEXE_INVALIDE
+    i = bisect_right([b for b, _ in AGES], _annee_reference(date_compet) - a)
+    cat_age = AGES[i - 1][1] if i else "Inconnu"
+    limites = POIDS.get((cat_age, None)) or POIDS.get((cat_age, sexe))
+    if limites is None: cat_poids = "Hors cat."
+    else:
+        j = bisect_left(limites, p)
+        cat_poids = f"+{limites[-1]}kg" if j >= len(limites) else f"-{limites[j]}kg"
+    return f"{cat_age} {sexe} {cat_poids}", OK if i else AGE_HORS_BAREME
+
+def categorize(df, date_compet=None, annee_col="Annee_Naissance", poids_col="Poids", sexe_col="Sexe"):
+    """Catégorie de chaque ligne de df, calculée colonne par colonne.
+    Renvoie un DataFrame aligné sur df : Cat_Age, Cat_Poids, Categorie ('Minime M -42kg') et Code (OK ou erreur)."""
+    n = len(df)
+    annee_raw, poids_raw = df[annee_col], df[poids_col]
+    sexe = _sexes(df[sexe_col]) if sexe_col in df else pd.Series([""] * n, index=df.index)
+    annee, poids = _nombres(annee_raw), _nombres(poids_raw)
+    age = (_annee_reference(date_compet) - annee).to_numpy()
+
+    # Âge -> catégorie : searchsorted sur les bornes basses
+    bornes = np.array([a for a, _ in AGES], dtype=float)
+    noms_age = np.array(["Inconnu"] + [c for _, c in AGES], dtype=object)
+    idx_age = np.where(np.isnan(age), 0, np.searchsorted(bornes, np.nan_to_num(age, nan=-1), side="right"))
+    cat_age = noms_age[idx_age]
+
+    # Poids -> limite : un searchsorted par barème (au plus 9 groupes)
+    cat_poids = np.full(n, "Hors cat.", dtype=object)
+    p = poids.to_numpy(dtype=float)
+    cle_sexe = np.where(sexe.to_numpy() == "F", "F", "M")
+    for (cat, sx), limites in POIDS.items():
+        mask = cat_age == cat
+        if sx is not None: mask &= cle_sexe == sx
+        mask &= ~np.isnan(p)
+        if not mask.any(): continue
+        lim = np.asarray(limites, dtype=float)
+        pos = np.searchsorted(lim, p[mask], side="left")
+        cat_poids[mask] = np.where(pos >= len(lim), f"+{limites[-1]}kg", np.array([f"-{l}kg" for l in limites] + [""], dtype=object)[pos])
+
+    categorie = pd.Series(cat_age, index=df.index) + " " + sexe + " " + pd.Series(cat_poids, index=df.index)
+
+    code = np.full(n, OK, dtype=object)
+    # Du moins grave au plus grave : le dernier code posé l'emporte
+    code[idx_age == 0] = AGE_HORS_BAREME
+    code[((sexe != "") & ~sexe.isin(["F", "M"])).to_numpy()] = SEXE_INVALIDE
+    code[(annee.isna() & ~_vides(annee_raw)).to_numpy()] = ANNEE_INVALIDE
+    code[((poids.isna() | (poids < 0)) & ~_vides(poids_raw)).to_numpy()] = POIDS_INVALIDE
+    code[(sexe == "").to_numpy()] = SEXE_MANQUANT
+    code[_vides(poids_raw).to_numpy()] = POIDS_MANQUANT
+    code[_vides(annee_raw).to_numpy()] = ANNEE_MANQUANTE
+    categorie = categorie.where(~np.isin(code, INVALIDES), "?")
+    categorie = categorie.where(~np.isin(code, MANQUANTS), "")
+
+    return pd.DataFrame({"Cat_Age": cat_age, "Cat_Poids": cat_poids, "Categorie": categorie.to_numpy(), "Code": code}, index=df.index)
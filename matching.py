@@ -0,0 +1,89 @@
+# --- NOMS : NORMALISATION & INDEX ATHLÈTES ---
+# Toutes les comparaisons de noms de l'appli passent par normaliser_nom :
+# "Léa  d'Arc", "LEA D ARC" et "lea d-arc" donnent la même clé.
+import re
+import unicodedata
+from collections import defaultdict
+
+
+def normaliser_nom(txt):
+    txt = unicodedata.normalize("NFKD", str(txt or "")).encode("ascii", "ignore").decode()
+    return " ".join(re.split(r"[^A-Z0-9]+", txt.upper())).strip()
+
+def decouper_combattant(combattant):
+    """'DE LA TOUR Jean' -> ('DE LA TOUR', 'Jean') : le dernier mot est le prénom"""
+    parts = str(combattant).split()
+    if len(parts) < 2: return str(combattant).strip(), ""
+    return " ".join(parts[:-1]), parts[-1]
+
+
+class AthleteIndex:
+    """Index des athlètes du club, construit une fois par instantané de la feuille Athletes"""
+    def __init__(self, df):
+        self.by_key = {}
+        self.by_full = {}
+        if df is None or df.empty or "Nom" not in df.columns or "Prenom" not in df.columns: return
+        for pos, rec in enumerate(df.to_dict("records")):
+            rec["_pos"] = pos
+            nom, prenom = normaliser_nom(rec["Nom"]), normaliser_nom(rec["Prenom"])
+            self.by_key.setdefault((nom, prenom), rec)
+            self.by_full.setdefault(f"{nom} {prenom}", rec)
+
+    def __len__(self): return len(self.by_key)
+
+    def get(self, nom, prenom):
+        return self.by_key.get((normaliser_nom(nom), normaliser_nom(prenom)))
+
+    def find(self, combattant):
+        """Athlète correspondant à un libellé 'NOM Prénom' (colonne Combattant), ou None"""
+        rec = self.by_full.get(normaliser_nom(combattant))
+        if rec is None: rec = self.get(*decouper_combattant(combattant))
+        return rec
+
+    def titre(self, combattant):
+        rec = self.find(combattant)
+        return rec.get("Titre_Honorifique", "") if rec else ""
+
+
+def cles_preinscriptions(df):
+    """Ensemble {(compétition, NOM, PRENOM)} des pré-inscriptions, pour un test d'appartenance en O(1)"""
+    if df is None or df.empty: return set()
+    return {(str(c), normaliser_nom(n), normaliser_nom(p)) for c, n, p in zip(df["Competition_Cible"], df["Nom"], df["Prenom"])}
+
+
+# --- RECHERCHE DES ATHLÈTES DANS UNE LISTE D'INSCRITS ---
+SEUIL_CONFIANCE = 0.9
+
+def mots(txt):
+    return normaliser_nom(txt).split()
+
+def _contient_suite(toks, suite):
+    n = len(suite)
+    return any(toks[i:i+n] == suite for i in range(len(toks) - n + 1))
+
+
+class NameMatcher:
+    """Index inversé mot -> lignes de concurrents. Chaque ligne n'est découpée qu'une fois ;
+    la recherche d'un athlète ne regarde que les lignes qui contiennent tous les mots de son nom.
+    On compare des mots entiers : 'LI' ne trouve plus 'LILIAN'."""
+    def __init__(self, lignes):
+        self.tokens = [mots(l) for l in lignes]
+        self.postings = defaultdict(set)
+        for i, toks in enumerate(self.tokens):
+            for t in toks: self.postings[t].add(i)
+
+    def match(self, nom, prenom, seuil=SEUIL_CONFIANCE):
+        """[(n° de ligne, confiance)] triés par confiance décroissante.
+        1.0 = nom + prénom côte à côte, 0.9 = tous les mots présents, 0.6 = nom + initiale du prénom."""
+        nt, pt = mots(nom), mots(prenom)
+        if not nt: return []
+        candidats = set.intersection(*(self.postings.get(t, set()) for t in nt))
+        res = []
+        for i in candidats:
+            toks = self.tokens[i]
+            if pt and (_contient_suite(toks, nt + pt) or _contient_suite(toks, pt + nt)): conf = 1.0
+            elif all(t in self.postings and i in self.postings[t] for t in pt): conf = 0.9
+            elif pt and any(t == pt[0][0] for t in toks): conf = 0.6
+            else: conf = 0.0
+            if conf >= seuil: res.append((i, conf))
+        return sorted(res, key=lambda x: -x[1])
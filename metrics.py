@@ -0,0 +1,129 @@
+# --- MESURES : DURÉES, APPELS GOOGLE, CACHES ---
+# Un registre par processus, comme le module logging : storage, scraper et App y notent ce qu'ils font,
+# l'onglet coach l'affiche et l'exporte. Une mesure coûte un verrou et un ajout en mémoire.
+import csv
+import io
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Quotas par défaut de l'API Google Sheets, par minute et par utilisateur (le compte de service compte pour un)
+QUOTA_LECTURE = 60
+QUOTA_ECRITURE = 60
+LECTURE, ECRITURE, DRIVE = "lecture", "écriture", "drive"  # drive : quota Drive, pas Sheets
+
+
+class Registre:
+    def __init__(self, max_evenements=20000, minutes=180):
+        self.lock = threading.Lock()
+        self.max_evenements, self.minutes = max_evenements, minutes
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.debut = time.time()
+            self.evenements = deque(maxlen=self.max_evenements)  # (horodatage, type, nom, durée s, détail)
+            self.durees = {}      # nom -> {"nb", "total", "max", "recents"}
+            self.requetes = {}    # minute -> Counter(type) : une requête = un appel API
+            self.par_feuille = {} # minute -> Counter((feuille, type))
+            self.caches = {}      # nom -> Counter(succes / echec)
+            self.erreurs = Counter()
+
+    # --- ENREGISTREMENT ---
+    @contextmanager
+    def span(self, nom, **detail):
+        """Durée du bloc ; `detail` (dict renvoyé) peut être complété pendant le bloc"""
+        t = time.perf_counter()
+        try: yield detail
+        finally: self.duree(nom, time.perf_counter() - t, **detail)
+
+    def duree(self, nom, secondes, **detail):
+        with self.lock:
+            d = self.durees.get(nom)
+            if d is None: d = self.durees[nom] = {"nb": 0, "total": 0.0, "max": 0.0, "recents": deque(maxlen=500)}
+            d["nb"] += 1; d["total"] += secondes; d["max"] = max(d["max"], secondes); d["recents"].append(secondes)
+            self.evenements.append((time.time(), "durée", nom, secondes, detail))
+
+    def appel(self, type_, feuilles=()):
+        """Une requête à l'API Google ; une lecture groupée compte une fois mais apparaît pour chaque feuille"""
+        minute = int(time.time() // 60)
+        with self.lock:
+            self.requetes.setdefault(minute, Counter())[type_] += 1
+            pf = self.par_feuille.setdefault(minute, Counter())
+            for f in feuilles or ("(classeur)",): pf[(f, type_)] += 1
+            for vieux in [m for m in self.requetes if m < minute - self.minutes]:
+                self.requetes.pop(vieux, None); self.par_feuille.pop(vieux, None)
+            self.evenements.append((time.time(), "api", type_, None, {"feuilles": list(feuilles)}))
+
+    def cache(self, nom, succes):
+        # Pas d'événement au journal : des milliers par minute, les compteurs suffisent
+        with self.lock: self.caches.setdefault(nom, Counter())["succes" if succes else "echec"] += 1
+
+    def erreur(self, nom, **detail):
+        with self.lock:
+            self.erreurs[nom] += 1
+            self.evenements.append((time.time(), "erreur", nom, None, detail))
+
+    # --- LECTURE ---
+    def tableau_durees(self):
+        with self.lock: items = [(n, d["nb"], d["total"], d["max"], sorted(d["recents"])) for n, d in self.durees.items()]
+        return [{"Mesure": n, "Nb": nb, "Moyenne (ms)": round(tot / nb * 1000, 1), "p95 (ms)": round(r[min(len(r) - 1, int(len(r) * 0.95))] * 1000, 1),
+                 "Max (ms)": round(mx * 1000, 1), "Total (s)": round(tot, 2)} for n, nb, tot, mx, r in sorted(items, key=lambda x: -x[2])]
+
+    def tableau_api(self, minutes=10):
+        """Requêtes par minute et par feuille sur les `minutes` dernières minutes, plus récentes en premier"""
+        maintenant = int(time.time() // 60)
+        with self.lock: pf = {m: Counter(c) for m, c in self.par_feuille.items() if m > maintenant - minutes}
+        rows = []
+        for m in sorted(pf, reverse=True):
+            for f in sorted({f for f, _ in pf[m]}):
+                rows.append({"Minute": datetime.fromtimestamp(m * 60).strftime("%H:%M"), "Feuille": f,
+                             "Lectures": pf[m][(f, LECTURE)], "Écritures": pf[m][(f, ECRITURE)], "Drive": pf[m][(f, DRIVE)]})
+        return rows
+
+    def quota(self):
+        """Requêtes de la minute en cours et pic des minutes passées, rapportés aux quotas Sheets"""
+        maintenant = int(time.time() // 60)
+        with self.lock: req = {m: Counter(c) for m, c in self.requetes.items()}
+        cur = req.get(maintenant, Counter())
+        pic_l = max((c[LECTURE] for c in req.values()), default=0)
+        pic_e = max((c[ECRITURE] for c in req.values()), default=0)
+        return {"lectures_minute": cur[LECTURE], "ecritures_minute": cur[ECRITURE], "drive_minute": cur[DRIVE],
+                "pic_lectures": pic_l, "pic_ecritures": pic_e, "quota_lecture": QUOTA_LECTURE, "quota_ecriture": QUOTA_ECRITURE}
+
+    def tableau_caches(self):
+        with self.lock: items = [(n, Counter(c)) for n, c in self.caches.items()]
+        return [{"Cache": n, "Succès": c["succes"], "Échecs": c["echec"],
+                 "Taux de succès": f"{c['succes'] / (c['succes'] + c['echec']):.0%}" if c["succes"] + c["echec"] else "-"} for n, c in sorted(items)]
+
+    # --- EXPORT ---
+    def export_json(self):
+        with self.lock: evts = list(self.evenements); debut = self.debut
+        return json.dumps({"debut": datetime.fromtimestamp(debut).isoformat(timespec="seconds"), "export": datetime.now().isoformat(timespec="seconds"),
+                           "durees": self.tableau_durees(), "api_par_minute": self.tableau_api(self.minutes), "quota": self.quota(),
+                           "caches": self.tableau_caches(), "erreurs": dict(self.erreurs),
+                           "evenements": [{"t": datetime.fromtimestamp(t).isoformat(timespec="milliseconds"), "type": ty, "nom": n,
+                                           "duree_ms": None if s is None else round(s * 1000, 3), "detail": d} for t, ty, n, s, d in evts]},
+                          ensure_ascii=False, indent=1, default=str)
+
+    def export_csv(self):
+        """Journal brut, un événement par ligne"""
+        with self.lock: evts = list(self.evenements)
+        out = io.StringIO()
+        w = csv.writer(out)
+        w.writerow(["horodatage", "type", "nom", "duree_ms", "detail"])
+        for t, ty, n, s, d in evts:
+            w.writerow([datetime.fromtimestamp(t).isoformat(timespec="milliseconds"), ty, n, "" if s is None else round(s * 1000, 3), json.dumps(d, ensure_ascii=False, default=str)])
+        return out.getvalue()
+
+
+REGISTRE = Registre()
+
+def span(nom, **detail): return REGISTRE.span(nom, **detail)
+def duree(nom, secondes, **detail): REGISTRE.duree(nom, secondes, **detail)
+def appel(type_, feuilles=()): REGISTRE.appel(type_, feuilles)
+def cache(nom, succes): REGISTRE.cache(nom, succes)
+def erreur(nom, **detail): REGISTRE.erreur(nom, **detail)
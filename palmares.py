@@ -0,0 +1,104 @@
+# --- PALMARÈS : AGRÉGATS DE L'HISTORIQUE ---
+# Historique ne fait que grandir : on ne traite que les lignes ajoutées depuis la dernière fois,
+# et on ne recalcule tout que si des lignes existantes ont été modifiées (édition à la main dans Sheets).
+# sync est appelé par le poller à chaque nouvel instantané d'Historique, pas à l'affichage.
+import bisect
+import threading
+from collections import Counter
+
+import pandas as pd
+
+import matching
+
+MEDAILLES = ["🥇 Or", "🥈 Argent", "🥉 Bronze"]
+
+
+def saison(date_txt):
+    """Saison sportive septembre -> août : '2024-10-12' -> '2024-2025'"""
+    d = pd.to_datetime(str(date_txt), errors="coerce")
+    if pd.isna(d): return "?"
+    y = d.year if d.month >= 9 else d.year - 1
+    return f"{y}-{y+1}"
+
+
+class Palmares:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.header = None
+        self.nb = 0              # lignes de données déjà comptées
+        self.lignes = []         # lignes comptées, comparées à chaque nouvel instantané (détecte une édition)
+        self.vu = None           # dernière grille reçue : un instantané n'est jamais modifié
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        self.athletes = {}       # NOM NORMALISÉ -> fiche
+        self.competitions = {}   # (compétition, date) -> résumé
+
+    def sync(self, values):
+        """Met les agrégats à jour d'après la grille Historique (en-tête + lignes)"""
+        if not values: return
+        with self.lock:
+            if values is self.vu: return
+            self.vu = values
+            header, rows = values[0], values[1:]
+            # Toutes les lignes déjà comptées, pas seulement la dernière : une médaille corrigée au milieu compte aussi
+            prefix_ok = header == self.header and rows[:self.nb] == self.lignes
+            if not prefix_ok:
+                self.reset(); self.header = header; self.nb = 0; self.lignes = []
+            if len(rows) == self.nb: return
+            col = {c: header.index(c) for c in ("Competition", "Date", "Combattant", "Medaille") if c in header}
+            if len(col) < 4: return
+            for row in rows[self.nb:]:
+                self._add(row[col["Competition"]], row[col["Date"]], row[col["Combattant"]], row[col["Medaille"]])
+            self.lignes = rows; self.nb = len(rows); self.version += 1
+
+    def _add(self, competition, date, combattant, medaille):
+        if not str(combattant).strip(): return
+        key = matching.normaliser_nom(combattant)
+        fiche = self.athletes.setdefault(key, {"Nom": combattant, "Participations": 0, "Medailles": Counter(), "Saisons": {}, "Resultats": []})
+        fiche["Participations"] += 1
+        fiche["Medailles"][medaille] += 1
+        fiche["Saisons"].setdefault(saison(date), Counter())[medaille] += 1
+        # Gardé trié par date à l'insertion : rien à trier à l'affichage
+        bisect.insort(fiche["Resultats"], (str(date), str(competition), str(medaille)))
+        comp = self.competitions.setdefault((competition, date), {"Competition": competition, "Date": date, "Participants": 0, "Medailles": Counter()})
+        comp["Participants"] += 1
+        comp["Medailles"][medaille] += 1
+
+    # --- LECTURE ---
+    def noms(self):
+        with self.lock: return [f["Nom"] for f in self.athletes.values()]
+
+    def fiche(self, combattant):
+        """Résumé d'un athlète : compteurs de médailles, taux, détail par saison et résultats récents d'abord"""
+        with self.lock:
+            f = self.athletes.get(matching.normaliser_nom(combattant))
+            if f is None: return None
+            n = f["Participations"]
+            podiums = sum(f["Medailles"][m] for m in MEDAILLES)
+            return {"Nom": f["Nom"], "Participations": n, **{m: f["Medailles"][m] for m in MEDAILLES},
+                    "Taux_Victoire": f["Medailles"][MEDAILLES[0]] / n if n else 0.0, "Taux_Podium": podiums / n if n else 0.0,
+                    "Saisons": {s: dict(c) for s, c in sorted(f["Saisons"].items(), reverse=True)},
+                    "Resultats": f["Resultats"][::-1]}
+
+    def tableau_athletes(self):
+        with self.lock:
+            rows = [{"Combattant": f["Nom"], **{m: f["Medailles"][m] for m in MEDAILLES}, "Participations": f["Participations"]} for f in self.athletes.values()]
+        df = pd.DataFrame(rows, columns=["Combattant", *MEDAILLES, "Participations"])
+        return df.sort_values(MEDAILLES, ascending=False, ignore_index=True)
+
+    def tableau_saisons(self):
+        with self.lock:
+            tot = {}
+            for f in self.athletes.values():
+                for s, c in f["Saisons"].items(): tot.setdefault(s, Counter()).update(c)
+        return pd.DataFrame([{"Saison": s, **{m: c[m] for m in MEDAILLES}, "Résultats": sum(c.values())} for s, c in sorted(tot.items(), reverse=True)],
+                            columns=["Saison", *MEDAILLES, "Résultats"])
+
+    def tableau_competitions(self):
+        with self.lock:
+            rows = [{"Competition": c["Competition"], "Date": c["Date"], "Participants": c["Participants"], **{m: c["Medailles"][m] for m in MEDAILLES}} for c in self.competitions.values()]
+        df = pd.DataFrame(rows, columns=["Competition", "Date", "Participants", *MEDAILLES])
+        return df.sort_values("Date", ascending=False, ignore_index=True)
+
@@ -0,0 +1,90 @@
+# --- PLANIFICATION DES AIRES ---
+# Modèle simple : chaque aire enchaîne les combats à son rythme, le n-ième combat d'une aire
+# a lieu au « créneau » n. Le repos d'un combattant se compte en créneaux entre deux de ses combats.
+import pandas as pd
+
+import matching
+
+
+def estimer_tours_detail(nb_competiteurs):
+    try:
+        n = int(nb_competiteurs)
+        if n <= 1: return "Seul (Gagnant)", 0
+        if n == 2: return "Finale Directe", 1
+        if n == 3: return "Poule (1 ou 2 combats)", 2
+        if n == 4: return "Demi + Finale", 2
+        if 5 <= n <= 8: return "Quart -> Finale", 3
+        if 9 <= n <= 16: return "8ème -> Finale", 4
+        return "Tableau > 16", 5
+    except: return "Inconnu", 0
+
+# Descriptions écrites dans Details_Tour à l'import, avec leur nombre de tours
+TOURS_PAR_DESC = dict(estimer_tours_detail(n) for n in (*range(1, 18), None))
+
+
+def lire_details(details):
+    """'Minime -40kg (Quart -> Finale)' -> ('Minime -40kg', 3). Sans estimation, on compte 1 tour ;
+    sans catégorie (cellule vide), on renvoie None : le combat forme un groupe à lui seul."""
+    details = str(details or "").strip()
+    # La description peut elle-même contenir des parenthèses : « Poule (1 ou 2 combats) »
+    for desc, tours in TOURS_PAR_DESC.items():
+        if details.endswith(f"({desc})"): return details[:-len(desc) - 2].strip() or None, max(1, tours)
+    return details or None, 1
+
+def planifier(live_df, nb_aires=6, repos_min=2):
+    """Propose Aire/Numero pour tous les combats 'à programmer' (Numero = 0, non terminés).
+    Les combats déjà programmés ne bougent pas : ils fixent la charge de départ de chaque aire.
+    - une catégorie reste sur une seule aire (celle où elle tourne déjà, sinon la moins chargée) ;
+    - les catégories aux plus longs tableaux sont placées et lancées en premier ;
+    - un combattant a au moins `repos_min` créneaux entre deux combats (sinon la ligne est signalée).
+    Renvoie un DataFrame indexé comme live_df : Combattant, Categorie, Tours, Aire, Numero, Alerte."""
+    cols = ["Combattant", "Categorie", "Tours", "Aire", "Numero", "Alerte"]
+    if live_df.empty: return pd.DataFrame(columns=cols)
+    df = live_df.copy()
+    df['Numero'] = pd.to_numeric(df['Numero'], errors='coerce').fillna(0).astype(int)
+    df['Aire'] = pd.to_numeric(df['Aire'], errors='coerce').fillna(0).astype(int)
+    en_cours = df[(df['Statut'] != "Terminé") & (df['Numero'] > 0)]
+    attente = df[(df['Statut'] != "Terminé") & (df['Numero'] == 0)]
+    if attente.empty: return pd.DataFrame(columns=cols)
+
+    aires = list(range(1, max(nb_aires, int(df['Aire'].max())) + 1))
+    # Charge d'une aire en tours de tableau, pour les combats déjà programmés comme pour ceux à placer
+    poids_aire = {a: 0 for a in aires}
+    dernier_num = {a: int(df.loc[df['Aire'] == a, 'Numero'].max()) if (df['Aire'] == a).any() else 0 for a in aires}
+    # Créneau déjà occupé par chaque combattant (position dans la file de son aire)
+    creneau_occupe = {}
+    for a, g in en_cours.sort_values('Numero').groupby('Aire'):
+        for pos, nom in enumerate(g['Combattant']): creneau_occupe.setdefault(matching.normaliser_nom(nom), []).append(pos)
+    aire_de_cat = {}
+    for row in en_cours.itertuples():
+        cat, tours = lire_details(row.Details_Tour)
+        if row.Aire in poids_aire: poids_aire[row.Aire] += tours
+        if cat is not None: aire_de_cat.setdefault(cat, row.Aire)
+
+    # Catégories : les plus lourdes d'abord (plus long tableau x nombre d'inscrits), sur l'aire la moins chargée
+    fights = [(row.Index, row.Combattant, *lire_details(row.Details_Tour)) for row in attente.itertuples()]
+    par_cat = {}
+    for f in fights: par_cat.setdefault(f[2] if f[2] is not None else ("", f[0]), []).append(f)
+    poids_cat = {c: sum(f[3] for f in fs) for c, fs in par_cat.items()}
+    files = {a: [] for a in aires}
+    for cat in sorted(par_cat, key=lambda c: -poids_cat[c]):
+        a = aire_de_cat.get(cat)
+        if a not in files: a = min(aires, key=lambda x: (poids_aire[x], x))
+        files[a] += sorted(par_cat[cat], key=lambda f: -f[3])
+        poids_aire[a] += poids_cat[cat]
+
+    # Sur chaque aire, on remplit les créneaux dans l'ordre en sautant les combattants qui n'ont pas assez récupéré
+    out = []
+    for a in aires:
+        file, t, num = list(files[a]), int((en_cours['Aire'] == a).sum()), dernier_num[a]
+        while file:
+            def repos_ok(f): return all(abs(t - s) >= repos_min for s in creneau_occupe.get(matching.normaliser_nom(f[1]), []))
+            choix = next((f for f in file if repos_ok(f)), file[0])
+            alerte = "" if repos_ok(choix) else "⚠️ repos court"
+            file.remove(choix)
+            num += 1
+            out.append((choix[0], choix[1], choix[2] or "", choix[3], a, num, alerte))
+            creneau_occupe.setdefault(matching.normaliser_nom(choix[1]), []).append(t)
+            t += 1
+    res = pd.DataFrame([o[1:] for o in out], index=[o[0] for o in out], columns=cols)
+    return res.sort_values(['Numero', 'Aire'])
@@ -0,0 +1,492 @@
+# --- ANALYSEUR HTML ---
+# Lecture en flux (lxml iterparse) : on ne garde en mémoire que le tableau en cours
+# et le meilleur trouvé jusque-là, sous forme de tuples de chaînes.
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse
+from xml.sax.saxutils import quoteattr
+
+import requests
+from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+import matching
+import metrics
+
+MOTS_ENTETE = ("nom", "cat", "poids", "weight")
+
+
+def _texte(el):
+    return " ".join("".join(el.itertext()).split())
+
+def _etendue(el, attr, maxi):
+    try: return max(1, min(int(el.get(attr, 1)), maxi))
+    except ValueError: return 1
+
+def _remplir(cur):
+    # Cellules descendues des lignes précédentes (rowspan) à la position courante
+    row, spans = cur["row"], cur["spans"]
+    while len(row) in spans:
+        n, v = spans[len(row)]
+        if n > 1: spans[len(row)] = (n - 1, v)
+        else: del spans[len(row)]
+        row.append(v)
+
+def _champ_vise(el, selecteur):
+    """Le <input> `el` correspond-il au sélecteur CSS ? Évalué sur la seule chaîne de ses ancêtres,
+    encore intacte pendant la lecture en flux (quelques champs par page : coût négligeable)."""
+    chaine = [*reversed(list(el.iterancestors())), el]
+    mini = "".join(f"<{e.tag}{''.join(f' {k}={quoteattr(v)}' for k, v in e.attrib.items() if ':' not in k)}{' data-ft-cible=1' if e is el else ''}>"
+                   for e in chaine if isinstance(e.tag, str))
+    return any(t.has_attr("data-ft-cible") for t in BeautifulSoup(mini, "html.parser").select(selecteur))
+
+def iter_tables(html_content, champ_connexion=None, formulaire=None):
+    """Génère (en-tête, lignes) pour chaque tableau, dans l'ordre où il se ferme.
+    L'en-tête est la première ligne du <thead>, ou à défaut la première ligne si elle n'est faite que de <th> ; sinon None.
+    Comme pd.read_html, colspan répète la cellule et rowspan la recopie dans les lignes suivantes.
+    champ_connexion (sélecteur CSS) : chaque <input> qu'il désigne est ajouté à la liste `formulaire`."""
+    data = html_content.encode("utf-8") if isinstance(html_content, str) else html_content
+    stack = []  # tableaux ouverts (imbriqués) : {"header", "rows", "row", "all_th", "thead", "spans"}
+    tags = ("table", "thead", "tr", "td", "th") + (("input",) if champ_connexion else ())
+    for event, el in etree.iterparse(io.BytesIO(data), events=("start", "end"), html=True, encoding="utf-8",
+                                     tag=tags, recover=True, no_network=True):
+        tag = el.tag
+        if tag == "input":
+            if event == "end" and _champ_vise(el, champ_connexion): formulaire.append(el.get("name"))
+            continue
+        if event == "start":
+            if tag == "table": stack.append({"header": None, "rows": [], "row": None, "all_th": True, "thead": False, "spans": {}})
+            elif tag == "thead" and stack: stack[-1]["thead"] = True
+            elif tag == "tr" and stack: stack[-1]["row"] = []; stack[-1]["all_th"] = True
+            continue
+        if not stack:
+            el.clear(); continue
+        cur = stack[-1]
+        if tag in ("td", "th"):
+            if cur["row"] is not None:
+                _remplir(cur)
+                texte, n = _texte(el), _etendue(el, "rowspan", 500)
+                for _ in range(_etendue(el, "colspan", 50)):
+                    if n > 1: cur["spans"][len(cur["row"])] = (n - 1, texte)
+                    cur["row"].append(texte)
+                cur["all_th"] &= tag == "th"
+            el.clear()
+        elif tag == "thead":
+            cur["thead"] = False
+        elif tag == "tr":
+            row = cur["row"]
+            if row is not None:
+                # Cellules recopiées en fin de ligne (rowspan sur les dernières colonnes)
+                while any(c >= len(row) for c in cur["spans"]):
+                    if len(row) in cur["spans"]: _remplir(cur)
+                    else: row.append("")
+            if row and any(row):
+                if cur["header"] is None and not cur["rows"] and (cur["thead"] or cur["all_th"]):
+                    cur["header"], cur["spans"] = row, {}
+                elif not cur["thead"]: cur["rows"].append(tuple(row))
+            cur["row"] = None
+            el.clear()
+        elif tag == "table":
+            stack.pop()
+            yield cur["header"], cur["rows"]
+            el.clear()
+            # On libère ce qui précède pour ne pas garder tout l'arbre
+            while el.getprevious() is not None: del el.getparent()[0]
+
+def entete_reconnue(header):
+    return bool(header) and any(m in str(h).lower() for h in header for m in MOTS_ENTETE)
+
+def _score(header, rows):
+    return len(rows) + (1_000_000 if entete_reconnue(header) else 0)
+
+def lire_liste(html_content, id_field_selector):
+    """Tableau de la liste (comme extraire_tableau) si la page est bien la liste d'inscrits, sinon None :
+    il faut un en-tête reconnu et pas de champ de connexion (une page de login mise en page avec des <table> ne compte pas).
+    Une seule lecture de la page ; le tableau renvoyé est repassé à parse_html_content."""
+    formulaire = []
+    header, rows, nb_tables = extraire_tableau(html_content, id_field_selector, formulaire)
+    if formulaire or not rows or not entete_reconnue(header): return None
+    return header, rows, nb_tables
+
+def extraire_tableau(html_content, champ_connexion=None, formulaire=None):
+    """Tableau de données le plus probable : un en-tête reconnu (nom/catégorie), puis le plus de lignes.
+    Renvoie (colonnes, lignes) avec des lignes de même largeur que les colonnes."""
+    best, best_score, nb_tables = None, -1, 0
+    for header, rows in iter_tables(html_content, champ_connexion, formulaire):
+        nb_tables += 1
+        if rows and _score(header, rows) > best_score: best, best_score = (header, rows), _score(header, rows)
+    if best is None: return [], [], nb_tables
+    header, rows = best
+    width = max(len(header or ()), *(len(r) for r in rows))
+    header = list(header or []) + [str(i) for i in range(len(header or ()), width)]
+    rows = [r + ("",) * (width - len(r)) if len(r) < width else r for r in rows]
+    return header, rows, nb_tables
+
+def parse_html_content(html_content, athletes_db, stats=None, tableau=None):
+    """stats (dict facultatif) reçoit les temps d'extraction et de recherche, en secondes.
+    tableau : résultat de extraire_tableau déjà obtenu (lire_liste en mode HTTP), la page n'est pas relue."""
+    stats = {} if stats is None else stats
+    t0 = time.perf_counter()
+    header, rows, stats["tables"] = tableau or extraire_tableau(html_content)
+    stats["lignes"] = len(rows)
+    stats["extraction_s"] = time.perf_counter() - t0
+    metrics.duree("parse_html_content.extraction", stats["extraction_s"], lignes=len(rows))
+
+    if not rows: return "ERROR", "Aucun tableau trouvé."
+
+    # Détection dynamique des colonnes
+    cols = [str(c).lower() for c in header]
+    col_cat = next((i for i, c in enumerate(cols) if 'cat' in c or 'poids' in c or 'weight' in c), None)
+
+    if col_cat is None: return "ERROR", "Pas de colonne 'Catégorie' détectée."
+
+    # Un seul passage : chaque ligne est découpée en mots une fois, puis indexée
+    t1 = time.perf_counter()
+    competitors = [" ".join(row).upper() for row in rows]
+    cats = [row[col_cat] for row in rows]
+    groups = {}
+    for i, cat in enumerate(cats): groups.setdefault(cat, []).append(i)
+    matcher = matching.NameMatcher(competitors)
+
+    matches = []
+    for ath in athletes_db[['Nom', 'Prenom']].itertuples(index=False):
+        seen = set()
+        for i, conf in matcher.match(ath.Nom, ath.Prenom):
+            if cats[i] in seen: continue
+            seen.add(cats[i])
+            matches.append({
+                "Nom": ath.Nom, "Prenom": ath.Prenom,
+                "Categorie_Web": cats[i],
+                "Nb_Poule": len(groups[cats[i]]),
+                "Adversaires": [competitors[j][:30]+"..." for j in groups[cats[i]] if j != i], # Clean names
+                "Confiance": conf
+            })
+    stats["matching_s"] = time.perf_counter() - t1
+    metrics.duree("parse_html_content.recherche", stats["matching_s"], athletes=len(athletes_db), trouves=len(matches))
+    return "SUCCESS", matches
+
+
+# --- ROBOT SELENIUM : NAVIGATEURS GARDÉS OUVERTS ---
+class CookieStore:
+    """Cookies de session par site, conservés sur disque jusqu'à leur expiration"""
+    def __init__(self, path="robot_cookies.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f: self.data = json.load(f)
+        except (OSError, ValueError): self.data = {}
+
+    def get(self, domain):
+        now = time.time()
+        with self.lock:
+            return [c for c in self.data.get(domain, []) if c.get("expiry", now + 1) > now]
+
+    def put(self, domain, cookies):
+        with self.lock:
+            self.data[domain] = cookies
+            try:
+                with open(self.path, "w") as f: json.dump(self.data, f)
+            except OSError: pass
+
+    def forget(self, domain):
+        self.put(domain, [])
+
+
+class DriverPool:
+    """Chrome headless démarré une fois et réutilisé d'un clic à l'autre.
+    Un navigateur est relancé après `max_uses` utilisations, après une erreur, ou s'il dort depuis `max_idle` s."""
+    def __init__(self, size=1, max_uses=50, max_idle=600, driver_path=None):
+        self.size, self.max_uses, self.max_idle = size, max_uses, max_idle
+        self.driver_path = driver_path or os.environ.get("CHROMEDRIVER_PATH")
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(size)
+        self.idle = []  # [(driver, nb d'utilisations, dernière utilisation)]
+
+    def _new_driver(self):
+        if self.driver_path is None:
+            # Le téléchargement / contrôle de version de chromedriver n'est fait qu'une fois par processus
+            self.driver_path = ChromeDriverManager().install()
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        return webdriver.Chrome(service=Service(self.driver_path), options=chrome_options)
+
+    @staticmethod
+    def _quit(driver):
+        try: driver.quit()
+        except Exception: pass
+
+    @contextmanager
+    def driver(self):
+        self.slots.acquire()
+        driver, uses = None, 0
+        try:
+            with self.lock:
+                while self.idle:
+                    d, u, last = self.idle.pop()
+                    if time.time() - last > self.max_idle: self._quit(d)
+                    else: driver, uses = d, u; break
+            if driver is None: driver = self._new_driver()
+            try: yield driver
+            except BaseException:
+                self._quit(driver); driver = None
+                raise
+            finally:
+                if driver is not None:
+                    if uses + 1 >= self.max_uses: self._quit(driver)
+                    else:
+                        with self.lock: self.idle.append((driver, uses + 1, time.time()))
+        finally:
+            self.slots.release()
+
+    def close_all(self):
+        with self.lock:
+            for d, _, _ in self.idle: self._quit(d)
+            self.idle = []
+
+
+class _TableStable:
+    """Condition d'attente : un <table> est présent et son nombre de lignes n'a pas bougé entre deux relevés"""
+    def __init__(self): self.last = None
+    def __call__(self, driver):
+        if driver.execute_script("return document.readyState") != "complete": return False
+        n = driver.execute_script("return document.querySelectorAll('table tr').length")
+        stable = n > 0 and n == self.last
+        self.last = n
+        return stable
+
+def _sans_requete(url):
+    u = urlparse(url)
+    return (u.netloc, u.path.rstrip("/"))
+
+def fetch_with_browser(pool, cookies, login_url, target_url, username, password, id_field_selector, pass_field_selector, submit_selector, etape=lambda msg: None, timeout=10):
+    """Récupère le HTML de la liste avec un navigateur du pool. Les cookies de session sont réutilisés
+    tant que le site ne redemande pas de connexion. Renvoie (html, "OK") ou (None, message d'erreur)."""
+    domain = urlparse(target_url).netloc
+    t0 = time.perf_counter()
+    try:
+        with pool.driver() as driver:
+            metrics.duree("robot.chrome", time.perf_counter() - t0)  # attente d'un navigateur libre, ou démarrage
+            wait = WebDriverWait(driver, timeout, poll_frequency=0.2)
+            # Navigateur neuf : on lui redonne la session enregistrée
+            saved = cookies.get(domain)
+            if saved and not driver.get_cookies():
+                driver.get(f"{urlparse(target_url).scheme}://{domain}/")
+                for c in saved:
+                    try: driver.add_cookie(c)
+                    except Exception: pass
+
+            etape("📄 Récupération de la liste des inscrits...")
+            driver.get(target_url)
+            # Pas (ou plus) connecté : formulaire affiché ou renvoi vers la page de login.
+            # L'absence de tableau ne dit rien, il peut être encore en cours de chargement (JavaScript).
+            if driver.find_elements(By.CSS_SELECTOR, id_field_selector) or _sans_requete(driver.current_url) == _sans_requete(login_url):
+                etape("🔐 Connexion au site...")
+                t_login = time.perf_counter()
+                driver.get(login_url)
+                try:
+                    user_box = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, id_field_selector)))
+                    pass_box = driver.find_element(By.CSS_SELECTOR, pass_field_selector)
+                    submit_btn = driver.find_element(By.CSS_SELECTOR, submit_selector)
+                    user_box.clear(); user_box.send_keys(username)
+                    pass_box.clear(); pass_box.send_keys(password)
+                    submit_btn.click()
+                except Exception as e:
+                    return None, f"❌ Impossible de trouver les champs de connexion. Vérifiez les sélecteurs CSS. ({str(e)})"
+                # Connexion validée dès que la page de login est quittée
+                try: wait.until(EC.any_of(EC.staleness_of(submit_btn), EC.url_changes(login_url)))
+                except TimeoutException: pass
+                cookies.put(domain, driver.get_cookies())
+                metrics.duree("robot.connexion", time.perf_counter() - t_login)
+                etape("📄 Récupération de la liste des inscrits...")
+                driver.get(target_url)
+
+            with metrics.span("robot.tableau"):
+                try: wait.until(_TableStable())
+                except TimeoutException: etape("⚠️ Le tableau met du temps à charger ou n'est pas standard...")
+            return driver.page_source, "OK"
+    except Exception as e:
+        return None, f"Erreur critique du Robot : {e}"
+
+
+# --- MODE HTTP (SANS NAVIGATEUR) ---
+class HttpFetcher:
+    """Session requests partagée (connexions gardées ouvertes) avec GET conditionnel (ETag / Last-Modified).
+    Suffit pour les listes rendues côté serveur derrière un simple formulaire de connexion."""
+    def __init__(self, cookies=None, timeout=15):
+        self.cookies, self.timeout = cookies, timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)))
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (X11; Linux x86_64) FightTracker"
+        self.lock = threading.Lock()
+        self.cache = {}  # url -> (etag, last_modified, html)
+        self.loaded = set()
+
+    def _load_cookies(self, url):
+        # Cookies enregistrés (par ce mode ou par le navigateur) : une seule fois par site
+        domain = urlparse(url).netloc
+        if self.cookies is None or domain in self.loaded: return
+        self.loaded.add(domain)
+        for c in self.cookies.get(domain):
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain", urlparse(url).hostname), path=c.get("path", "/"))
+
+    def _save_cookies(self, url):
+        if self.cookies is None: return
+        host = urlparse(url).hostname or ""
+        self.cookies.put(urlparse(url).netloc, [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, **({"expiry": c.expires} if c.expires else {})}
+                                                for c in self.session.cookies if host.endswith(c.domain.lstrip("."))])
+
+    def get(self, url):
+        """Renvoie (html, inchangé ?) ; un 304 ressert la version déjà téléchargée"""
+        self._load_cookies(url)
+        with self.lock: etag, modified, cached = self.cache.get(url, (None, None, None))
+        headers = {}
+        if cached is not None:
+            if etag: headers["If-None-Match"] = etag
+            if modified: headers["If-Modified-Since"] = modified
+        resp = self.session.get(url, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304 and cached is not None: return cached, True
+        resp.raise_for_status()
+        if resp.headers.get("ETag") or resp.headers.get("Last-Modified"):
+            with self.lock: self.cache[url] = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.text)
+        return resp.text, False
+
+    def login(self, login_url, username, password, id_field_selector, pass_field_selector, submit_selector):
+        """Poste le formulaire qui contient les champs désignés par les sélecteurs CSS (champs cachés / CSRF compris)"""
+        self._load_cookies(login_url)
+        resp = self.session.get(login_url, timeout=self.timeout)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, "lxml")
+        user_box, pass_box = soup.select_one(id_field_selector), soup.select_one(pass_field_selector)
+        if user_box is None or pass_box is None or not user_box.get("name") or not pass_box.get("name"): return False
+        form = user_box.find_parent("form")
+        data = {i["name"]: i.get("value", "") for i in (form or soup).find_all("input") if i.get("name") and i.get("type") not in ("submit", "button", "image", "checkbox", "radio")}
+        data[user_box["name"]] = username; data[pass_box["name"]] = password
+        btn = soup.select_one(submit_selector)
+        if btn is not None and btn.get("name"): data[btn["name"]] = btn.get("value", "")
+        action = urljoin(resp.url, (form.get("action") if form else None) or resp.url)
+        if form is not None and form.get("method", "post").lower() == "get": r = self.session.get(action, params=data, timeout=self.timeout)
+        else: r = self.session.post(action, data=data, timeout=self.timeout)
+        r.raise_for_status()
+        self._save_cookies(login_url)
+        return True
+
+    def fetch(self, login_url, target_url, username, password, id_field_selector, pass_field_selector, submit_selector):
+        """(HTML de la liste, inchangé ?, tableau extrait), ou (None, False, None) si la réponse brute
+        n'est pas reconnue comme telle (page rendue en JavaScript)"""
+        html, unchanged = self.get(target_url)
+        tableau = lire_liste(html, id_field_selector)
+        if tableau: return html, unchanged, tableau
+        if not self.login(login_url, username, password, id_field_selector, pass_field_selector, submit_selector): return None, False, None
+        html, unchanged = self.get(target_url)
+        tableau = lire_liste(html, id_field_selector)
+        return (html, unchanged, tableau) if tableau else (None, False, None)
+
+
+def fetch_list(http, pool, cookies, login_url, target_url, username, password, id_field_selector, pass_field_selector, submit_selector,
+               force_browser=False, etape=lambda msg: None):
+    """HTTP d'abord, navigateur seulement si la réponse brute n'est pas une liste reconnue.
+    Renvoie (html, message, {"mode", "duree_s"}), plus "tableau" (déjà extrait) en mode HTTP."""
+    t0 = time.perf_counter()
+    if not force_browser:
+        etape("⚡ Récupération directe (HTTP)...")
+        try:
+            with metrics.span("robot.http", url=target_url) as d:
+                html, unchanged, tableau = http.fetch(login_url, target_url, username, password, id_field_selector, pass_field_selector, submit_selector)
+                d["resultat"] = "304" if unchanged else "OK" if html else "sans tableau"
+            if html: return html, "OK", {"mode": "HTTP (inchangée, 304)" if unchanged else "HTTP", "duree_s": time.perf_counter() - t0, "tableau": tableau}
+        except requests.RequestException as e:
+            etape(f"⚠️ Mode HTTP impossible ({e}), passage au navigateur...")
+    etape("🤖 Le robot démarre Chrome...")
+    with metrics.span("robot.navigateur", url=target_url):
+        html, msg = fetch_with_browser(pool, cookies, login_url, target_url, username, password, id_field_selector, pass_field_selector, submit_selector, etape=etape)
+    return html, msg, {"mode": "Navigateur (Selenium)", "duree_s": time.perf_counter() - t0}
+
+
+# --- LOT DE COMPÉTITIONS ---
+def expand_targets(lines, nb_pages=1):
+    """Une URL par ligne ; '{page}' dans une URL la décline en pages 1..nb_pages"""
+    targets = []
+    for line in lines:
+        line = line.strip()
+        if not line: continue
+        if "{page}" in line: targets += [line.replace("{page}", str(p)) for p in range(1, nb_pages + 1)]
+        else: targets.append(line)
+    return list(dict.fromkeys(targets))
+
+def _analyser(html_content, athletes, tableau):
+    # Exécuté dans le pool d'analyse : renvoie aussi sa propre durée, sans l'attente dans la file
+    t = time.perf_counter()
+    try: status, matches = parse_html_content(html_content, athletes, None, tableau)
+    except Exception as e: status, matches = "ERROR", f"Analyse impossible : {e}"
+    return status, matches, time.perf_counter() - t
+
+def scrape_batch(urls, fetch, athletes_db, max_workers=4, retries=2, backoff=1.0, process_pool=None):
+    """Télécharge les listes en parallèle (au plus `max_workers` à la fois, `retries` nouvelles tentatives
+    espacées de backoff, 2*backoff...) et lance l'analyse de chaque page dès son arrivée, dans
+    `process_pool` si fourni. fetch(url) -> (html, message, info), comme fetch_list.
+    Génère un état {"url", "statut", "tentatives", "mode", "duree_s", "matches"} à chaque étape ;
+    duree_s ne compte que le téléchargement et l'analyse de l'URL, pas l'attente d'un fil ou d'un processus libre."""
+    athletes = athletes_db[['Nom', 'Prenom']].copy()
+
+    def fetch_retry(url):
+        msg, info, t = "", {}, time.perf_counter()
+        for attempt in range(1, retries + 2):
+            try: html, msg, info = fetch(url)
+            except Exception as e: html, msg = None, str(e)
+            if html: return html, info, attempt, msg, time.perf_counter() - t
+            if attempt <= retries: time.sleep(backoff * 2 ** (attempt - 1))
+        return None, info, attempt, msg, time.perf_counter() - t
+
+    with ThreadPoolExecutor(max_workers=max_workers) as io_pool:
+        parse_pool = process_pool or io_pool
+        pending = {io_pool.submit(fetch_retry, url): (url, None) for url in urls}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url, state = pending.pop(fut)
+                if state is None:
+                    html, info, attempts, msg, fetch_s = fut.result()
+                    state = {"url": url, "tentatives": attempts, "mode": info.get("mode", ""), "matches": [], "fetch_s": fetch_s}
+                    if html is None:
+                        yield {**state, "statut": f"❌ {msg}", "duree_s": fetch_s}
+                        continue
+                    yield {**state, "statut": "🔎 Analyse...", "duree_s": fetch_s}
+                    # Tableau déjà extrait en mode HTTP : seul lui part vers l'analyse, pas la page
+                    tableau = info.get("tableau")
+                    if tableau: html = None
+                    state = {**state, "html": html, "tableau": tableau}
+                    try: pending[parse_pool.submit(_analyser, html, athletes, tableau)] = (url, state)
+                    except BrokenProcessPool:
+                        parse_pool = io_pool
+                        pending[parse_pool.submit(_analyser, html, athletes, tableau)] = (url, state)
+                else:
+                    try: status, matches, analyse_s = fut.result()
+                    except BrokenProcessPool:
+                        # Processus d'analyse indisponibles : on termine le lot dans les fils
+                        parse_pool = io_pool
+                        pending[parse_pool.submit(_analyser, state["html"], athletes, state["tableau"])] = (url, state)
+                        continue
+                    except Exception as e: status, matches, analyse_s = "ERROR", f"Analyse impossible : {e}", 0.0
+                    state = {k: v for k, v in state.items() if k not in ("html", "tableau", "fetch_s")} | {"duree_s": state["fetch_s"] + analyse_s}
+                    if status == "SUCCESS": state = {**state, "statut": f"✅ {len(matches)} athlète(s)", "matches": matches}
+                    else: state = {**state, "statut": f"⚠️ {matches}"}
+                    yield state
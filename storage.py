@@ -0,0 +1,580 @@
+# --- STOCKAGE : GOOGLE SHEETS / SQLITE LOCAL ---
+# Les deux moteurs manipulent la même chose : une grille de chaînes (en-tête + lignes),
+# exactement ce que renverrait ws.get_all_values(). Le diff et le contrôle de conflit sont communs.
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from gspread.exceptions import APIError
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1, numericise_all
+
+import metrics
+from metrics import LECTURE, ECRITURE, DRIVE
+
+SPREADSHEET = "suivi_combats"
+
+# Colonnes indexées dans SQLite (celles qui servent aux recherches de l'appli)
+INDEXES = {
+    "Feuille 1": [("Combattant",), ("Numero", "Aire")],
+    "Historique": [("Combattant",), ("Competition",)],
+    "Athletes": [("Nom", "Prenom")],
+    "PreInscriptions": [("Competition_Cible", "Nom", "Prenom")],
+}
+
+
+class Conflict(Exception):
+    """Les cellules à écrire ont été modifiées par quelqu'un d'autre depuis la lecture"""
+
+
+# --- GRILLES ---
+def cell_value(v):
+    """Valeur envoyable à l'API (pas de NaN ni de types numpy)"""
+    if v is None or v is pd.NA: return ""
+    if hasattr(v, "item"): v = v.item()
+    if isinstance(v, float) and v != v: return ""
+    return v
+
+def cell_str(v):
+    """Représentation texte d'une cellule, telle que relue par get_all_values"""
+    v = cell_value(v)
+    if isinstance(v, float) and v.is_integer(): return str(int(v))
+    return str(v)
+
+def grille_texte(values):
+    """Grille telle que la relirait get_all_values (les nombres redeviennent du texte)"""
+    return [[cell_str(v) for v in r] for r in values]
+
+def normalize_values(values):
+    if not values: return []
+    width = len(values[0])
+    return [[str(c) for c in values[0]]] + [[str(c) for c in r[:width]] + [""] * (width - len(r)) for r in values[1:]]
+
+def values_to_df(values):
+    if not values: return pd.DataFrame()
+    return pd.DataFrame([numericise_all(r) for r in values[1:]], columns=values[0])
+
+def df_to_values(df):
+    return [[str(c) for c in df.columns]] + [[cell_value(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+def diff_values(base, new):
+    """Renvoie (plages modifiées, lignes ajoutées), ou None si une réécriture complète est nécessaire"""
+    if not base or not new or base[0] != new[0] or len(new) < len(base): return None
+    updates = []
+    for r in range(1, len(base)):
+        changed = [c for c, v in enumerate(new[r]) if base[r][c] != cell_str(v)]
+        # On regroupe les cellules contiguës d'une même ligne en une seule plage
+        while changed:
+            start = end = changed.pop(0)
+            while changed and changed[0] == end + 1: end = changed.pop(0)
+            updates.append((r, start, end))
+    return updates, new[len(base):]
+
+def plan_write(current, base, new):
+    """Contrôle optimiste : lève Conflict si les cellules touchées ont bougé depuis `base`.
+    Renvoie None (réécriture complète) ou (plages modifiées, lignes ajoutées)."""
+    plan = diff_values(base, new)
+    if plan is None:
+        if base is not None and current != base: raise Conflict()
+        return None
+    if current[:1] != base[:1]: raise Conflict()
+    # Ligne entière comparée : une ligne supprimée ou un tri à la main dans Sheets décale les combattants
+    for r in {r for r, _, _ in plan[0]}:
+        if r >= len(current) or current[r] != base[r]: raise Conflict()
+    return plan
+
+
+class RevisionStore:
+    """Grilles lues récemment, indexées par révision (empreinte du contenu)"""
+    def __init__(self, max_revs=64):
+        self.max_revs = max_revs
+        self.lock = threading.Lock()
+        self.revs = OrderedDict()
+
+    def remember(self, values):
+        rev = hashlib.md5(json.dumps(values).encode()).hexdigest()
+        with self.lock:
+            self.revs[rev] = values; self.revs.move_to_end(rev)
+            while len(self.revs) > self.max_revs: self.revs.popitem(last=False)
+        return rev
+
+    def get(self, rev):
+        with self.lock: return self.revs.get(rev)
+
+
+# --- MOTEUR GOOGLE SHEETS ---
+class SheetsBackend:
+    def __init__(self, client_factory, spreadsheet=SPREADSHEET):
+        self.client_factory = client_factory
+        self.spreadsheet = spreadsheet
+        self.lock = threading.Lock()
+        self.sh = None
+        self.worksheets = {}
+
+    def _spreadsheet(self):
+        if self.sh is None:
+            client = self.client_factory()
+            metrics.appel(DRIVE); self.sh = client.open(self.spreadsheet)
+        return self.sh
+
+    def worksheet(self, name, cols):
+        # Les poignées de feuilles sont gardées : open() + worksheets() ne coûtent qu'une fois
+        with self.lock:
+            if name in self.worksheets: metrics.cache("poignées de feuilles", True); return self.worksheets[name]
+        metrics.cache("poignées de feuilles", False)
+        try:
+            with metrics.span("worksheet", feuille=name):
+                sh = self._spreadsheet()
+                metrics.appel(LECTURE); ws_list = [s.title for s in sh.worksheets()]
+                if name in ws_list: metrics.appel(LECTURE, [name]); ws = sh.worksheet(name)
+                else:
+                    metrics.appel(ECRITURE, [name]); ws = sh.add_worksheet(name, 1000, len(cols)+2)
+                    metrics.appel(ECRITURE, [name]); ws.append_row(cols)
+        except Exception: return None
+        with self.lock: self.worksheets[name] = ws
+        return ws
+
+    def read(self, name, cols):
+        ws = self.worksheet(name, cols)
+        if ws is None: return None
+        metrics.appel(LECTURE, [name])
+        return normalize_values(ws.get_all_values())
+
+    def read_many(self, names):
+        """Toutes les feuilles demandées en un seul appel (values_batch_get)"""
+        sh = self._spreadsheet()
+        metrics.appel(LECTURE, names)
+        res = sh.values_batch_get(["'%s'" % n.replace("'", "''") for n in names])
+        return {n: normalize_values(vr.get("values", [])) for n, vr in zip(names, res.get("valueRanges", []))}
+
+    def revisions(self, names):
+        # Date de modification Drive du classeur : un appel léger, commun à toutes les feuilles
+        sh = self._spreadsheet()
+        metrics.appel(DRIVE); token = sh.get_lastUpdateTime()
+        return {n: token for n in names}
+
+    def write(self, name, cols, base, new, current=None):
+        """Écrit la grille `new` lue à l'origine comme `base`.
+        `current` : grille que l'appelant vient de relire (WriteQueue.flush), pour ne pas la relire une seconde fois.
+        Renvoie la grille résultante, ou None si la feuille est inaccessible."""
+        ws = self.worksheet(name, cols)
+        if ws is None: return None
+        if current is None:
+            metrics.appel(LECTURE, [name]); current = normalize_values(ws.get_all_values())
+        plan = plan_write(current, base, new)
+        result = [[cell_str(v) for v in r] for r in new]
+        if plan is None:
+            metrics.appel(ECRITURE, [name]); ws.update(new, "A1")
+            # On efface ce qui dépasse au lieu de vider la feuille avant : jamais de feuille vide
+            extra = []
+            if len(current) > len(new): extra.append(f"A{len(new)+1}:{rowcol_to_a1(len(current), max(len(current[0]), len(new[0])))}")
+            if current and len(current[0]) > len(new[0]): extra.append(f"{rowcol_to_a1(1, len(new[0])+1)}:{rowcol_to_a1(len(new), len(current[0]))}")
+            if extra: metrics.appel(ECRITURE, [name]); ws.batch_clear(extra)
+        else:
+            updates, appends = plan
+            if updates:
+                metrics.appel(ECRITURE, [name])
+                ws.batch_update([{"range": f"{rowcol_to_a1(r+1, start+1)}:{rowcol_to_a1(r+1, end+1)}", "values": [new[r][start:end+1]]} for r, start, end in updates])
+            if appends: metrics.appel(ECRITURE, [name]); ws.append_rows(appends)
+            # Les lignes ajoutées entre-temps par d'autres sont conservées
+            result = [list(r) for r in current]
+            for r, start, end in updates: result[r][start:end+1] = [cell_str(v) for v in new[r][start:end+1]]
+            result += [[cell_str(v) for v in r] for r in appends]
+        return result
+
+
+# --- MOTEUR SQLITE (WAL) ---
+class SQLiteBackend:
+    """Stockage local principal. `remote` (SheetsBackend) sert à l'amorçage et à la synchro en tâche de fond."""
+    def __init__(self, path="fight_tracker.db", remote=None, sync_interval=10):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _sheets (name TEXT PRIMARY KEY, tbl TEXT, header TEXT, rev INTEGER)")
+        self.remote = remote
+        self.sync = SheetsSync(self, remote, sync_interval) if remote is not None else None
+
+    @staticmethod
+    def table_name(name):
+        return "s_" + re.sub(r"\W", "_", name.lower())
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT tbl, header FROM _sheets WHERE name=?", (name,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def _create(self, name, header):
+        tbl = self.table_name(name)
+        self.conn.execute(f'DROP TABLE IF EXISTS "{tbl}"')
+        cols = "".join(f', "c{i}" TEXT' for i in range(len(header)))
+        self.conn.execute(f'CREATE TABLE "{tbl}" (_row INTEGER PRIMARY KEY{cols})')
+        for i, idx_cols in enumerate(INDEXES.get(name, [])):
+            if all(c in header for c in idx_cols):
+                on = ", ".join(f'"c{header.index(c)}"' for c in idx_cols)
+                self.conn.execute(f'CREATE INDEX "{tbl}_i{i}" ON "{tbl}" ({on})')
+        self.conn.execute("INSERT OR REPLACE INTO _sheets VALUES (?, ?, ?, COALESCE((SELECT rev FROM _sheets WHERE name=?), 0))",
+                          (name, tbl, json.dumps(header), name))
+        return tbl
+
+    def _insert(self, tbl, rows, start):
+        if not rows: return
+        marks = ", ".join("?" * (len(rows[0]) + 1))
+        self.conn.executemany(f'INSERT INTO "{tbl}" VALUES ({marks})', [(start + i, *map(cell_str, r)) for i, r in enumerate(rows)])
+
+    def _read(self, name):
+        tbl, header = self._meta(name)
+        if tbl is None: return None
+        rows = self.conn.execute(f'SELECT * FROM "{tbl}" ORDER BY _row').fetchall()
+        return [header] + [list(r[1:]) for r in rows]
+
+    def read(self, name, cols):
+        with self.lock:
+            values = self._read(name)
+        if values is None:
+            # Première lecture : on part du contenu Google Sheets s'il est disponible
+            remote_values = self.remote.read(name, cols) if self.remote is not None else None
+            if remote_values: self.sync.pushed[name] = remote_values
+            values = remote_values or ([list(cols)] if cols else [])
+            with self.lock:
+                if self._read(name) is None: self._replace(name, normalize_values(values))
+                values = self._read(name)
+        return values
+
+    def read_many(self, names):
+        return {n: self.read(n, []) for n in names}
+
+    def revisions(self, names):
+        with self.lock:
+            rows = dict(self.conn.execute("SELECT name, rev FROM _sheets").fetchall())
+        return {n: rows.get(n) for n in names}
+
+    def _replace(self, name, values):
+        if not values: return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            tbl, header = self._meta(name)
+            if header != values[0]: tbl = self._create(name, values[0])
+            else: self.conn.execute(f'DELETE FROM "{tbl}"')
+            self._insert(tbl, values[1:], 1)
+            self.conn.execute("UPDATE _sheets SET rev = rev + 1 WHERE name=?", (name,))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK"); raise
+
+    def write(self, name, cols, base, new, current=None):
+        # `current` ignoré : relire sous le verrou de la transaction ne coûte rien en local
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._read(name) or []
+                plan = plan_write(current, base, new)
+                tbl, header = self._meta(name)
+                if plan is None:
+                    if header != [str(c) for c in new[0]]: tbl = self._create(name, [str(c) for c in new[0]])
+                    else: self.conn.execute(f'DELETE FROM "{tbl}"')
+                    self._insert(tbl, new[1:], 1)
+                else:
+                    updates, appends = plan
+                    for r, start, end in updates:
+                        sets = ", ".join(f'"c{c}"=?' for c in range(start, end + 1))
+                        self.conn.execute(f'UPDATE "{tbl}" SET {sets} WHERE _row=?', [cell_str(v) for v in new[r][start:end+1]] + [r])
+                    self._insert(tbl, appends, len(current))
+                self.conn.execute("UPDATE _sheets SET rev = rev + 1 WHERE name=?", (name,))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK"); raise
+            result = self._read(name)
+        if self.sync is not None: self.sync.mark(name, cols)
+        return result
+
+
+# --- SYNCHRO SQLITE -> GOOGLE SHEETS ---
+class SheetsSync:
+    """Pousse en tâche de fond les feuilles modifiées localement vers Google Sheets (SQLite fait foi)"""
+    def __init__(self, local, remote, interval=10):
+        self.local, self.remote, self.interval = local, remote, interval
+        self.dirty = {}
+        self.pushed = {}
+        self.conflicts = {}  # feuille -> colonnes : modifiée à la main dans Sheets, poussée suspendue
+        self.forced = set()
+        self.last_error = None
+        self.cond = threading.Condition()
+        threading.Thread(target=self._run, name="sheets-sync", daemon=True).start()
+
+    def mark(self, name, cols):
+        with self.cond:
+            self.dirty[name] = cols; self.cond.notify()
+
+    def force(self, name):
+        """Écrase la feuille Google Sheets avec la base locale malgré le conflit"""
+        with self.cond:
+            cols = self.conflicts.get(name)
+            if cols is None: return
+            self.forced.add(name); self.dirty[name] = cols; self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.dirty: self.cond.wait()
+                batch, self.dirty = self.dirty, {}
+            for name, cols in batch.items():
+                try: self.push(name, cols)
+                except Exception as e:
+                    self.last_error = f"{name} : {e}"
+                    with self.cond: self.dirty.setdefault(name, cols)
+            time.sleep(self.interval)
+
+    def push(self, name, cols):
+        values = self.local.read(name, cols)
+        if values: values = values[:1] + [numericise_all(r) for r in values[1:]]  # SQLite ne garde que du texte
+        with self.cond: forced = name in self.forced; self.forced.discard(name)
+        try: self.remote.write(name, cols, None if forced else self.pushed.get(name), values)
+        except Conflict:
+            # Modifiée à la main dans Sheets : rien n'est écrasé sans l'accord d'un coach (voir force)
+            with self.cond: self.conflicts[name] = cols
+            self.last_error = f"{name} : modifiée dans Google Sheets depuis le dernier envoi, synchronisation suspendue"
+            metrics.erreur("synchro Sheets : conflit")
+            return
+        with self.cond:
+            self.conflicts.pop(name, None)
+            if not self.conflicts: self.last_error = None
+        self.pushed[name] = grille_texte(values)
+
+
+# --- INSTANTANÉS PARTAGÉS ---
+class Snapshot:
+    """Contenu d'une feuille à un instant donné. Ne jamais modifier `df` : en faire une copie."""
+    def __init__(self, name, values, rev):
+        self.name, self.values, self.rev = name, values, rev
+        self.df = values_to_df(values)
+        self.df.attrs['rev'] = rev
+        self.loaded_at = time.time()
+        self.lock = threading.RLock()
+        self.memo = {}
+
+    def derived(self, key, build):
+        """Structure calculée une seule fois par instantané (index, vues triées...)"""
+        with self.lock:
+            metrics.cache("calculs dérivés", key in self.memo)
+            if key not in self.memo: self.memo[key] = build(self.df)
+            return self.memo[key]
+
+
+class SnapshotPoller:
+    """Un seul fil pour tout le processus : relit les feuilles suivies quand leur révision change
+    et publie des instantanés que toutes les sessions partagent."""
+    def __init__(self, backend, revisions, interval=5):
+        self.backend, self.revisions, self.interval = backend, revisions, interval
+        self.lock = threading.Lock()
+        self.snapshots = {}
+        self.cols = {}
+        self.tokens = {}
+        self.held = set()  # feuilles avec des écritures en attente : l'instantané local fait foi
+        self.abonnes = {}  # feuille -> rappels appelés avec chaque nouvelle grille publiée
+        self.last_error = None
+        threading.Thread(target=self._run, name="snapshot-poller", daemon=True).start()
+
+    def get(self, name, cols):
+        with self.lock:
+            snap = self.snapshots.get(name)
+            self.cols.setdefault(name, cols)
+        metrics.cache("instantanés", snap is not None)
+        if snap is None:
+            values = self.backend.read(name, cols)
+            if values is None: return None
+            snap = self.publish(name, values)
+        return snap
+
+    def publish(self, name, values):
+        """Remplace l'instantané (après une lecture ou une écriture locale). Contenu identique = même instantané."""
+        rev = self.revisions.remember(values)
+        with self.lock:
+            snap = self.snapshots.get(name)
+            if snap is not None and snap.rev == rev: return snap
+            snap = self.snapshots[name] = Snapshot(name, values, rev)
+            rappels = list(self.abonnes.get(name, ()))
+        for rappel in rappels:
+            try: rappel(snap.values)
+            except Exception as e: metrics.erreur("abonné instantané", feuille=name, message=repr(e))
+        return snap
+
+    def suivre(self, name, cols, rappel):
+        """Appelle rappel(grille) à chaque nouvel instantané de la feuille (lecture, sondage ou écriture locale),
+        et tout de suite avec l'instantané courant : les agrégats se tiennent à jour hors des rendus."""
+        with self.lock: self.abonnes.setdefault(name, []).append(rappel)
+        snap = self.get(name, cols)
+        if snap: rappel(snap.values)
+
+    def invalidate(self, name):
+        """Oublie l'instantané (écritures abandonnées) : la prochaine lecture repart de la feuille"""
+        with self.lock:
+            self.snapshots.pop(name, None); self.tokens.pop(name, None); self.held.discard(name)
+
+    def refresh(self):
+        with self.lock: names = [n for n in self.cols if n not in self.held]
+        if not names: return
+        tokens = self.backend.revisions(names)
+        changed = [n for n in names if tokens.get(n) is None or tokens[n] != self.tokens.get(n)]
+        if not changed: return
+        for name, values in self.backend.read_many(changed).items():
+            if values: self.publish(name, values)
+            self.tokens[name] = tokens.get(name)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with metrics.span("poller.refresh"): self.refresh()
+                self.last_error = None
+            except Exception as e: self.last_error = str(e)
+
+
+# --- ÉCRITURES DIFFÉRÉES ---
+class Patch:
+    """Modification d'une feuille exprimée par rapport à la grille lue (`base`) :
+    cellules {(ligne, colonne): nouvelle valeur} + lignes ajoutées, ou remplacement complet.
+    Les valeurs gardent leur type (un nombre reste un nombre dans Sheets) ; les comparaisons se font en texte."""
+    def __init__(self, sheet, cols, base, new, label="", refus=None):
+        """base = None : feuille lue vide ou jamais lue, le remplacement n'est accepté que si elle l'est toujours.
+        refus : raison de refuser d'office (lecture perdue ou en échec), le patch sera traité comme un conflit"""
+        self.sheet, self.cols, self.label = sheet, cols, label
+        self.created = time.time()
+        self.error = None
+        self.refus = refus
+        new = [[cell_value(v) for v in r] for r in new]
+        plan = diff_values(base, new)
+        if plan is None:
+            self.replace, self.base, self.new = True, base, new
+        else:
+            self.replace = False
+            updates, appends = plan
+            header = base[0]
+            # Ligne lue entière pour chaque ligne touchée : une suppression ou un tri dans Sheets est un conflit
+            self.rows = {r: base[r] for r, _, _ in updates}
+            self.cells = {(r, header[c]): new[r][c] for r, start, end in updates for c in range(start, end + 1)}
+            self.appends = [dict(zip(header, row)) for row in appends]
+
+    def empty(self):
+        return not self.replace and not self.cells and not self.appends
+
+    def apply(self, grid):
+        """Applique le patch à une copie de `grid` ; lève Conflict si les cellules visées ont changé"""
+        if self.refus: raise Conflict(self.refus)
+        if self.replace:
+            # Sans lecture d'origine, on ne remplace qu'une feuille sans données : jamais d'historique effacé
+            if self.base is None and len(grid) > 1: raise Conflict("Feuille non vide et lecture d'origine inconnue : rechargez et recommencez")
+            if self.base is not None and grille_texte(grid) != self.base: raise Conflict()
+            return [list(r) for r in self.new]
+        grid = [list(r) for r in grid]
+        header = grid[0] if grid else list(self.appends[0]) if self.appends else []
+        if not grid: grid = [header]
+        for r, row in self.rows.items():
+            if r >= len(grid) or [cell_str(v) for v in grid[r]] != row: raise Conflict()
+        for (r, col), new in self.cells.items():
+            if col not in header: raise Conflict()
+            grid[r][header.index(col)] = new
+        grid += [[row.get(col, "") for col in header] for row in self.appends]
+        return grid
+
+
+def quota_error(e):
+    return isinstance(e, APIError) and getattr(e.response, "status_code", 0) in (429, 500, 502, 503)
+
+
+class WriteQueue:
+    """Les écritures d'un clic (ou de plusieurs clics rapprochés) sont regroupées en un seul envoi par feuille,
+    fait par un fil dédié. En cas de quota dépassé, nouvel essai avec attente croissante (jusqu'à max_backoff s)."""
+    def __init__(self, backend, poller, delay=0.5, max_backoff=60, max_attempts=6):
+        self.backend, self.poller = backend, poller
+        self.delay, self.max_backoff, self.max_attempts = delay, max_backoff, max_attempts
+        self.cond = threading.Condition()
+        self.pending = {}   # feuille -> [Patch]
+        self.failed = []    # [Patch] abandonnés (conflit ou erreur), visibles dans le panneau coach
+        self.attempts = {}
+        self.next_try = {}
+        self.last_error = None
+        threading.Thread(target=self._run, name="write-behind", daemon=True).start()
+
+    def submit(self, patch):
+        """Met le patch en file et publie tout de suite la version attendue pour l'affichage"""
+        if patch.empty(): return
+        with self.cond:
+            self.pending.setdefault(patch.sheet, []).append(patch)
+            self.poller.held.add(patch.sheet)
+            snap = self.poller.snapshots.get(patch.sheet)
+            if snap is not None:
+                try: self.poller.publish(patch.sheet, grille_texte(patch.apply(snap.values)))
+                except Conflict: pass
+            self.cond.notify()
+
+    def status(self):
+        with self.cond:
+            return {"pending": {s: len(p) for s, p in self.pending.items() if p}, "failed": list(self.failed),
+                    "attempts": dict(self.attempts), "last_error": self.last_error}
+
+    def retry_failed(self):
+        with self.cond:
+            for p in self.failed: self.pending.setdefault(p.sheet, []).append(p); self.poller.held.add(p.sheet)
+            self.failed = []; self.cond.notify()
+
+    def discard_failed(self):
+        with self.cond:
+            sheets = {p.sheet for p in self.failed}
+            self.failed = []
+            # Les valeurs abandonnées ont pu rester affichées : on relit les feuilles sans écriture en attente
+            for sheet in sheets:
+                if not self.pending.get(sheet): self.poller.invalidate(sheet)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not any(self.pending.values()): self.cond.wait()
+            time.sleep(self.delay)  # on laisse arriver les clics suivants
+            now = time.time()
+            with self.cond: sheets = [s for s, p in self.pending.items() if p and self.next_try.get(s, 0) <= now]
+            for sheet in sheets:
+                with metrics.span("ecriture.envoi", feuille=sheet): self.flush(sheet)
+            if not sheets: time.sleep(0.5)
+
+    def flush(self, sheet):
+        with self.cond: patches = list(self.pending.get(sheet, []))
+        if not patches: return
+        try:
+            current = self.backend.read(sheet, patches[0].cols)
+            if current is None: raise RuntimeError(f"Feuille « {sheet} » inaccessible")
+            working, ok, rejected = current, [], []
+            for p in patches:
+                try: working = p.apply(working); ok.append(p)
+                except Conflict as e:
+                    p.error = str(e) or "Conflit : ces cellules ont été modifiées par quelqu'un d'autre"; rejected.append(p)
+            result = self.backend.write(sheet, patches[0].cols, current, working, current=current) if ok else current
+            if result is None: raise RuntimeError(f"Feuille « {sheet} » inaccessible")
+        except Conflict:
+            return  # la feuille a bougé entre la lecture et l'écriture : on recommence au prochain tour
+        except Exception as e:
+            self.last_error = f"{sheet} : {e}"
+            metrics.erreur("quota Sheets dépassé" if quota_error(e) else "écriture en échec")
+            with self.cond:
+                n = self.attempts[sheet] = self.attempts.get(sheet, 0) + 1
+                if quota_error(e) or n < self.max_attempts:
+                    self.next_try[sheet] = time.time() + min(self.max_backoff, 2 ** n)
+                else:
+                    for p in patches: p.error = str(e)
+                    self.failed += patches
+                    self.pending[sheet] = self.pending[sheet][len(patches):]
+                    self.attempts.pop(sheet, None); self.next_try.pop(sheet, None)
+                    # Plus rien en attente : l'instantané affichait les valeurs non enregistrées, on le relit
+                    if not self.pending[sheet]: self.poller.invalidate(sheet)
+            return
+        with self.cond:
+            self.pending[sheet] = self.pending[sheet][len(patches):]
+            self.failed += rejected
+            self.attempts.pop(sheet, None); self.next_try.pop(sheet, None)
+            if not self.pending[sheet]: self.poller.held.discard(sheet)
+            # Si d'autres patchs sont arrivés pendant l'envoi, on garde la version locale qui les inclut déjà
+            if not self.pending[sheet]: self.poller.publish(sheet, result)
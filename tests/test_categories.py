@@ -0,0 +1,35 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+import categories
+from categories import categorize, categorize_one
+
+ANNEES = [None, "", "0", 0, "nan", "None", float("nan"), "abc", "2010", " 2012 ", "2016", "2019", "2025", "1980", 1990, 2008.0, "2007,0", "NaN", "inf"]
+POIDS = [None, "", "0", "0.0", 0.0, "x", "40", "40,5", 23, 23.0, "23.01", "47", "48", "94", "120", 56, "nan", float("nan"), "-5", -0.5, "inf"]
+SEXES = [None, "", " ", "nan", "F", "M", "f", " m ", float("nan"), "X", 1]
+DATES = [None, "14/03/2026", pd.Timestamp("2024-09-01"), "n'importe quoi"]
+
+
+@pytest.mark.parametrize("date_compet", DATES)
+def test_categorize_one_identique_a_categorize(date_compet):
+    rows = list(itertools.product(ANNEES, POIDS, SEXES))
+    df = pd.DataFrame(rows, columns=["Annee_Naissance", "Poids", "Sexe"], dtype=object)
+    res = categorize(df, date_compet)
+    attendu = list(zip(res["Categorie"], res["Code"]))
+    assert [categorize_one(a, p, s, date_compet) for a, p, s in rows] == attendu
+
+@pytest.mark.parametrize("annee, poids, sexe, attendu", [
+    ("2012", "40", "M", ("Cadet M -42kg", categories.OK)),
+    ("2012", "40", "", ("", categories.SEXE_MANQUANT)),
+    ("2012", "40", None, ("", categories.SEXE_MANQUANT)),
+    ("2012", "-40", "M", ("?", categories.POIDS_INVALIDE)),
+    ("2012", "40", "X", ("?", categories.SEXE_INVALIDE)),
+    ("1990", "66", "f", ("Senior F -70kg", categories.OK)),
+    ("2024", "20", "M", ("Inconnu M Hors cat.", categories.AGE_HORS_BAREME)),
+])
+def test_codes(annee, poids, sexe, attendu):
+    assert categorize_one(annee, poids, sexe, "14/03/2026") == attendu
+    res = categorize(pd.DataFrame([{"Annee_Naissance": annee, "Poids": poids, "Sexe": sexe}]), "14/03/2026")
+    assert (res["Categorie"].iat[0], res["Code"].iat[0]) == attendu
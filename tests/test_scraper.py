@@ -0,0 +1,22 @@
+import pandas as pd
+
+import scraper
+
+
+def test_rowspan_recopie_la_categorie():
+    page = ("<table><tr><th>Nom</th><th>Club</th><th>Catégorie</th></tr>"
+            "<tr><td>DUPONT Jean</td><td>C1</td><td rowspan=3>Minime -42kg</td></tr>"
+            "<tr><td>B</td><td>C2</td></tr><tr><td>C</td><td>C3</td></tr><tr><td>D</td><td>C4</td><td>Cadet</td></tr></table>")
+    header, rows, _ = scraper.extraire_tableau(page)
+    assert [r[2] for r in rows] == ["Minime -42kg"] * 3 + ["Cadet"]
+    status, matches = scraper.parse_html_content(page, pd.DataFrame([{"Nom": "DUPONT", "Prenom": "Jean"}]))
+    assert status == "SUCCESS" and matches[0]["Nb_Poule"] == 3
+
+def test_rowspan_en_premiere_colonne_ne_decale_pas():
+    page = ("<table><tr><th>Catégorie</th><th>Nom</th><th>Club</th></tr>"
+            "<tr><td rowspan=2>Minime</td><td>A</td><td>C1</td></tr><tr><td>B</td><td>C2</td></tr></table>")
+    assert list(scraper.iter_tables(page)) == [(["Catégorie", "Nom", "Club"], [("Minime", "A", "C1"), ("Minime", "B", "C2")])]
+
+def test_entete_thead_en_td():
+    page = "<table><thead><tr><td>Nom</td><td>Catégorie</td></tr></thead><tbody><tr><td>A</td><td>Minime</td></tr></tbody></table>"
+    assert list(scraper.iter_tables(page)) == [(["Nom", "Catégorie"], [("A", "Minime")])]
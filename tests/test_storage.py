@@ -0,0 +1,99 @@
+import pytest
+
+from storage import Conflict, Patch, diff_values, plan_write
+
+H = ["Combattant", "Aire", "Statut"]
+BASE = [H, ["A X", "1", "A venir"], ["B Y", "2", "A venir"], ["C Z", "0", "A venir"]]
+
+
+def copie(grid): return [list(r) for r in grid]
+
+
+# --- diff_values ---
+def test_diff_regroupe_les_cellules_contigues():
+    new = copie(BASE); new[1][1] = "3"; new[1][2] = "Terminé"; new[3][2] = "Terminé"
+    assert diff_values(BASE, new) == ([(1, 1, 2), (3, 2, 2)], [])
+
+def test_diff_compare_en_texte():
+    new = copie(BASE); new[1][1] = 1; new[2][1] = 2.0
+    assert diff_values(BASE, new) == ([], [])
+
+def test_diff_lignes_ajoutees():
+    new = copie(BASE) + [["D W", 0, "A venir"]]
+    assert diff_values(BASE, new) == ([], [["D W", 0, "A venir"]])
+
+@pytest.mark.parametrize("base, new", [
+    (None, BASE), ([], BASE), (BASE, []),
+    (BASE, [["Nom", "Aire", "Statut"]] + BASE[1:]),  # en-tête changé
+    (BASE, BASE[:2]),                                # lignes supprimées
+])
+def test_diff_reecriture_complete(base, new):
+    assert diff_values(base, new) is None
+
+
+# --- plan_write ---
+def test_plan_sans_changement_concurrent():
+    new = copie(BASE); new[2][2] = "Terminé"
+    assert plan_write(copie(BASE), BASE, new) == ([(2, 2, 2)], [])
+
+def test_plan_garde_les_modifications_ailleurs():
+    current = copie(BASE); current[3][1] = "4"  # autre ligne modifiée par un autre coach
+    new = copie(BASE); new[2][2] = "Terminé"
+    assert plan_write(current, BASE, new) == ([(2, 2, 2)], [])
+
+def test_plan_conflit_sur_la_meme_ligne():
+    current = copie(BASE); current[2][1] = "5"
+    new = copie(BASE); new[2][2] = "Terminé"
+    with pytest.raises(Conflict): plan_write(current, BASE, new)
+
+def test_plan_conflit_si_ligne_supprimee():
+    current = [BASE[0], BASE[1], BASE[3]]
+    new = copie(BASE); new[2][2] = "Terminé"
+    with pytest.raises(Conflict): plan_write(current, BASE, new)
+
+def test_plan_conflit_si_entete_change():
+    current = [["Nom", "Aire", "Statut"]] + copie(BASE[1:])
+    new = copie(BASE); new[1][1] = "3"
+    with pytest.raises(Conflict): plan_write(current, BASE, new)
+
+def test_plan_remplacement_verifie_la_base():
+    with pytest.raises(Conflict): plan_write(BASE + [["D W", "0", ""]], BASE, BASE[:2])
+    assert plan_write(copie(BASE), BASE, BASE[:2]) is None
+
+
+# --- Patch.apply ---
+def test_patch_applique_cellules_et_ajouts():
+    new = copie(BASE); new[2][2] = "Terminé"; new.append(["D W", 0, "A venir"])
+    grid = Patch("Feuille 1", H, BASE, new).apply(copie(BASE))
+    assert grid[2] == ["B Y", "2", "Terminé"] and grid[4] == ["D W", 0, "A venir"]
+
+def test_patch_conserve_les_lignes_ajoutees_par_d_autres():
+    new = copie(BASE); new[1][2] = "Terminé"
+    grid = Patch("Feuille 1", H, BASE, new).apply(copie(BASE) + [["E V", "1", "A venir"]])
+    assert len(grid) == 5 and grid[1][2] == "Terminé"
+
+def test_patch_ligne_supprimee_est_un_conflit():
+    new = copie(BASE); new[2][2] = "Terminé"
+    with pytest.raises(Conflict): Patch("Feuille 1", H, BASE, new).apply([BASE[0], BASE[1], BASE[3]])
+
+def test_patch_ligne_modifiee_est_un_conflit():
+    new = copie(BASE); new[2][2] = "Terminé"
+    current = copie(BASE); current[2][1] = "6"
+    with pytest.raises(Conflict): Patch("Feuille 1", H, BASE, new).apply(current)
+
+def test_patch_sans_base_refuse_une_feuille_non_vide():
+    # Lecture en échec : DataFrame vide + une ligne, il ne doit pas remplacer l'historique
+    p = Patch("Historique", H, None, [H, ["Z", "1", "Or"]])
+    with pytest.raises(Conflict): p.apply(copie(BASE))
+    assert p.apply([H]) == [H, ["Z", "1", "Or"]]
+    assert p.apply([]) == [H, ["Z", "1", "Or"]]
+
+def test_patch_refuse_d_office():
+    new = copie(BASE); new[1][1] = "3"
+    with pytest.raises(Conflict, match="rechargez"): Patch("Feuille 1", H, BASE, new, refus="Lecture perdue : rechargez").apply(copie(BASE))
+
+def test_patch_remplacement_verifie_la_base():
+    p = Patch("Feuille 1", H, BASE, BASE[:2])
+    assert p.replace and p.apply(copie(BASE)) == BASE[:2]
+    current = copie(BASE); current[3][2] = "Terminé"
+    with pytest.raises(Conflict): p.apply(current)